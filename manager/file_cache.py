@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Callable, Dict, Generic, Iterable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class StatCache(Generic[T]):
+    """
+    path -> load(path, stat) result, reused while the file's (mtime_ns, size) stay
+    the same, so unchanged files are not re-read.
+    """
+
+    def __init__(self, load: Callable[[Path, os.stat_result], T]) -> None:
+        self._load = load
+        self._entries: Dict[Path, Tuple[int, int, T]] = {}
+
+    def get(self, path: Path) -> T:
+        """
+        Cached value for path; raises OSError if the file cannot be stat'ed.
+        """
+        st = path.stat()
+        cached = self._entries.get(path)
+        if cached and cached[:2] == (st.st_mtime_ns, st.st_size):
+            return cached[2]
+        value = self._load(path, st)
+        self._entries[path] = (st.st_mtime_ns, st.st_size, value)
+        return value
+
+    def prune(self, keep: Iterable[Path]) -> None:
+        """
+        Drop entries for files that are no longer listed.
+        """
+        for stale in set(self._entries) - set(keep):
+            self._entries.pop(stale, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore[assignment]
+
+# Files at least this big are parsed straight from a read-only mapping.
+_MMAP_MIN_BYTES = 1 << 20
+
+
+def dumps(obj: Any, indent: bool = True) -> bytes:
+    """
+    Serialize obj to UTF-8 JSON bytes, using orjson when it is installed.
+    Falls back to the stdlib for payloads orjson rejects.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, option=option)
+        except TypeError:
+            pass
+    if indent:
+        return json.dumps(obj, indent=2).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load_path(path: Path | str) -> Any:
+    """
+    Parse a JSON file from its raw bytes without decoding to str first.
+    With orjson, large files are parsed from an mmap so the contents are not copied.
+    """
+    with open(path, "rb") as f:
+        if orjson is not None and os.fstat(f.fileno()).st_size >= _MMAP_MIN_BYTES:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                return orjson.loads(view)
+        return loads(f.read())
+
+
+def dump_path(path: Path, obj: Any, indent: bool = True) -> None:
+    """
+    Write obj as JSON to a sibling temp file and swap it in, so readers never see a partial file.
+    """
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(dumps(obj, indent=indent))
+    os.replace(tmp, path)
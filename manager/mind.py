@@ -33,13 +33,14 @@ from manager.task_grower import ensure_tasks_for_concept
 from manager.embeddings import get_embedding
 from manager.neuron_graph import NeuronGraph
 from manager.value_function import ValueFunction
-from manager.reward import compute_reward
+from manager.reward import compute_reward, task_potential
 from manager.agents import PlannerAgent, CoderAgent, CriticAgent, MemoryAgent
 from manager.envs import TextPuzzleEnv, SymbolEnv
 from manager.async_orchestrator import AsyncOrchestrator
 
 PLUGINS_DIR = Path("plugins")
 DIARY_FILE = Path("manager/mind_diary.json")
+_JSON_ENC = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
 
 
 class Mind:
@@ -102,6 +103,11 @@ class Mind:
             self.memory_agent = MemoryAgent(self)
 
     def step(self) -> None:
+        # A step touches the neuron graph many times; write it out once at the end.
+        with self.neuron_graph.batch():
+            self._run_step()
+
+    def _run_step(self) -> None:
         self._last_selection_info = []
         self._current_step_actions = []
         self._percepts = []
@@ -185,6 +191,8 @@ class Mind:
         created = ensure_tasks_for_concept(concept)
         if created:
             self.tasks = load_tasks()
+            # the new manager reloads from disk, so write out pending results first
+            self.task_state.flush()
             self.task_state = TaskStateManager(self.tasks)
             event = {
                 "action": "added_concept",
@@ -287,6 +295,15 @@ class Mind:
         self.neuron_graph.update_edge_weight(plugin_node, env_node, reward_value * 0.3)
         return percept
 
+    def _task_potential(self, plugin_name: str) -> float | None:
+        """
+        Shaping potential of the plugin's task state, or None when it has no tasks.
+        """
+        tstats = self.task_state.plugin_task_stats(plugin_name)
+        if not tstats["task_count"]:
+            return None
+        return task_potential(tstats["avg_streak"], tstats["failing_count"])
+
     def _score_plugin(self, plugin_name: str) -> Dict[str, float]:
         p = self.graph.graph.get("plugins", {}).get(plugin_name, {})
         tests_passed = float(p.get("tests_passed", 0))
@@ -533,8 +550,12 @@ class Mind:
                 }
             )
         self.curriculum.update_results(task_results)
+        prev_potential = self._task_potential(plugin_name)
         if task_outcomes:
             self.task_state.record_task_results(task_outcomes)
+        potentials = {}
+        if prev_potential is not None:
+            potentials = {"prev_potential": prev_potential, "next_potential": self._task_potential(plugin_name)}
         self.brain.record_error_event(plugin_name, err_type, success=eval_ok)
         streak = self.brain.get_error_streak(plugin_name, err_type)
         web_consult_info = None
@@ -558,6 +579,7 @@ class Mind:
                 "domain": "code",
                 "tests_delta": tests_delta,
                 "regressions": failed_count if not tests_ok else 0.0,
+                **potentials,
             }
             reward, details = compute_reward(outcome, return_details=True)
             self.brain.record_attempt(mutation_id, True)
@@ -593,6 +615,7 @@ class Mind:
             "domain": "code",
             "tests_delta": tests_delta,
             "regressions": failed_count if tests_ok is False else 0.0,
+            **potentials,
         }
         reward, details = compute_reward(outcome, return_details=True)
         self.brain.record_attempt(mutation_id, False)
@@ -839,17 +862,39 @@ class Mind:
             self._stagnation_steps = 0
 
     def _append_to_diary(self, entry: Dict[str, Any]) -> None:
+        """
+        The diary stays a JSON array with one compact entry per line, so a new
+        entry is spliced in before the closing bracket instead of re-encoding
+        the whole history. Falls back to a full rewrite if the tail looks off.
+        """
+        line = _JSON_ENC.encode(entry).encode("utf-8")
         try:
-            if DIARY_FILE.exists():
+            with DIARY_FILE.open("r+b") as f:
+                if not f.read(4096).lstrip().startswith(b"["):
+                    raise ValueError("diary is not a JSON array")
+                size = f.seek(0, os.SEEK_END)
+                f.seek(max(0, size - 4096))
+                tail = f.read()
+                body = tail.rstrip()
+                head = body[:-1].rstrip() if body.endswith(b"]") else b""
+                if not head:
+                    raise ValueError("unrecognised diary tail")
+                f.seek(size - len(tail) + len(head))
+                f.write((b"\n" if head.endswith(b"[") else b",\n") + line + b"\n]\n")
+                f.truncate()
+            return
+        except FileNotFoundError:
+            data: List[Any] = []
+        except Exception:
+            try:
                 data = json.loads(DIARY_FILE.read_text(encoding="utf-8"))
                 if not isinstance(data, list):
                     data = []
-            else:
+            except Exception:
                 data = []
-        except Exception:
-            data = []
         data.append(entry)
-        DIARY_FILE.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        body = ",\n".join(_JSON_ENC.encode(item) for item in data)
+        DIARY_FILE.write_text("[\n" + body + "\n]\n", encoding="utf-8")
 
     def _consult_web(self, plugin_name: str, error_type: str) -> Dict[str, str]:
         error_docs = {
@@ -1,22 +1,38 @@
 import ast
 import copy
 import textwrap
-from typing import Dict, Optional, Tuple
+from typing import Dict, Optional, Tuple, Union
 
 
 class MutationPattern:
     def __init__(self, name: str):
         self.name = name
 
-    def apply(self, src: str) -> Optional[str]:  # pragma: no cover - interface
+    def apply(self, src: str) -> Optional[str]:
+        try:
+            tree = ast.parse(src)
+        except SyntaxError:
+            return None
+        new_tree = self.apply_ast(tree)
+        if new_tree is None:
+            return None
+        ast.fix_missing_locations(new_tree)
+        return _module_to_source(new_tree)
+
+    def apply_ast(self, tree: ast.Module) -> Optional[ast.Module]:  # pragma: no cover - interface
+        """
+        Mutate ``tree`` in place and return it, or None when nothing applies.
+        """
         raise NotImplementedError
 
 
 def _module_to_source(tree: ast.Module) -> str:
-    parts = []
-    for node in tree.body:
-        parts.append(ast.unparse(node))
-    return "\n\n".join(parts) + "\n"
+    """
+    Regenerate the whole file from the tree, so a mutated plugin loses its comments
+    and original layout: ast.unparse normalizes spacing and quotes, keeps one blank
+    line around functions and classes and none between simple statements.
+    """
+    return ast.unparse(tree) + "\n"
 
 
 def _handlers_equivalent(a: list, b: list) -> bool:
@@ -28,48 +44,46 @@ def _handlers_equivalent(a: list, b: list) -> bool:
     return True
 
 
-def try_stats(src: str) -> Tuple[Dict[str, int], int]:
+def try_stats(src: Union[str, ast.AST]) -> Tuple[Dict[str, int], int]:
     """
     Return (per-function try count, max nesting depth across functions).
+    Accepts source text or an already parsed tree.
     """
-    try:
-        tree = ast.parse(src)
-    except SyntaxError:
-        return {}, 0
+    if isinstance(src, ast.AST):
+        tree = src
+    else:
+        try:
+            tree = ast.parse(src)
+        except SyntaxError:
+            return {}, 0
 
     func_counts: Dict[str, int] = {}
     max_depth = 0
-
-    def visit(node, depth=0, current_func=None):
-        nonlocal max_depth
+    stack = [(tree, 0, None)]
+    while stack:
+        node, depth, current_func = stack.pop()
         if isinstance(node, ast.FunctionDef):
             current_func = node.name
         if isinstance(node, ast.Try):
-            max_depth = max(max_depth, depth + 1)
+            depth += 1
+            if depth > max_depth:
+                max_depth = depth
             if current_func:
                 func_counts[current_func] = func_counts.get(current_func, 0) + 1
-            for child in ast.iter_child_nodes(node):
-                visit(child, depth + 1, current_func)
-        else:
-            for child in ast.iter_child_nodes(node):
-                visit(child, depth, current_func)
-
-    visit(tree)
+        stack.extend((child, depth, current_func) for child in ast.iter_child_nodes(node))
     return func_counts, max_depth
 
 
 def _max_try_depth_in_function(func: ast.FunctionDef) -> int:
     max_depth = 0
-
-    def visit(node, depth=0):
-        nonlocal max_depth
+    stack = [(func, 0)]
+    while stack:
+        node, depth = stack.pop()
         if isinstance(node, ast.Try):
             depth += 1
-            max_depth = max(max_depth, depth)
-        for child in ast.iter_child_nodes(node):
-            visit(child, depth)
-
-    visit(func)
+            if depth > max_depth:
+                max_depth = depth
+        stack.extend((child, depth) for child in ast.iter_child_nodes(node))
     return max_depth
 
 
@@ -79,6 +93,8 @@ class _TryNormalizer(ast.NodeTransformer):
     """
 
     def visit_Try(self, node: ast.Try):
+        # Children are normalized once up front; collapsing only re-parents
+        # already-visited statements, so they are not walked again.
         self.generic_visit(node)
         while (
             len(node.body) == 1
@@ -96,7 +112,6 @@ class _TryNormalizer(ast.NodeTransformer):
                 orelse=[],
                 finalbody=[],
             )
-            self.generic_visit(node)
         return node
 
 
@@ -117,8 +132,7 @@ class TryWrapPattern(MutationPattern):
     def __init__(self):
         super().__init__("try_wrap")
 
-    def apply(self, src: str) -> Optional[str]:
-        tree = ast.parse(src)
+    def apply_ast(self, tree: ast.Module) -> Optional[ast.Module]:
         changed = False
         for i, node in enumerate(tree.body):
             if isinstance(node, ast.FunctionDef):
@@ -126,9 +140,10 @@ class TryWrapPattern(MutationPattern):
                     continue
                 if node.body and isinstance(node.body[0], ast.Try):
                     continue
-                new_node = copy.deepcopy(node)
+                # Only the body list is replaced, so a shallow copy is enough.
+                new_node = copy.copy(node)
                 try_block = ast.Try(
-                    body=new_node.body,
+                    body=list(node.body),
                     handlers=[
                         ast.ExceptHandler(
                             type=ast.Name(id="Exception", ctx=ast.Load()),
@@ -145,16 +160,14 @@ class TryWrapPattern(MutationPattern):
                 break
         if not changed:
             return None
-        ast.fix_missing_locations(tree)
-        return _module_to_source(tree)
+        return tree
 
 
 class NoneGuardPattern(MutationPattern):
     def __init__(self):
         super().__init__("none_guard")
 
-    def apply(self, src: str) -> Optional[str]:
-        tree = ast.parse(src)
+    def apply_ast(self, tree: ast.Module) -> Optional[ast.Module]:
         changed = False
 
         def has_existing_guard(fn: ast.FunctionDef, arg_name: str) -> bool:
@@ -194,15 +207,14 @@ class NoneGuardPattern(MutationPattern):
                     body=[ast.Return(value=ast.Constant(value=None))],
                     orelse=[],
                 )
-                new_node = copy.deepcopy(node)
-                new_node.body.insert(0, guard)
+                new_node = copy.copy(node)
+                new_node.body = [guard, *node.body]
                 tree.body[i] = new_node
                 changed = True
                 break
         if not changed:
             return None
-        ast.fix_missing_locations(tree)
-        return _module_to_source(tree)
+        return tree
 
 class TouchUpPattern(MutationPattern):
     def __init__(self):
@@ -210,6 +222,7 @@ class TouchUpPattern(MutationPattern):
 
     def apply(self, src: str) -> Optional[str]:
         marker = "# auto-touch"
+        # counted per source: one shared instance touches many plugin files
         count = src.count(marker)
         new_marker = f"{marker}-{count + 1}" if count else marker
         return src + ("\n" if not src.endswith("\n") else "") + new_marker + "\n"
@@ -274,20 +287,16 @@ class AttrFixPattern(MutationPattern):
                 )
             ).body[0],
         }
+        self.template_sigs = {name: ast.dump(t, include_attributes=False) for name, t in self.templates.items()}
 
-    def apply(self, src: str) -> Optional[str]:
-        try:
-            tree = ast.parse(src)
-        except SyntaxError:
-            return None
+    def apply_ast(self, tree: ast.Module) -> Optional[ast.Module]:
         changed = False
         seen = set()
         for i, node in enumerate(tree.body):
             if isinstance(node, ast.FunctionDef) and node.name in self.templates:
                 seen.add(node.name)
-                template = self.templates[node.name]
-                if ast.dump(node, include_attributes=False) != ast.dump(template, include_attributes=False):
-                    tree.body[i] = template
+                if ast.dump(node, include_attributes=False) != self.template_sigs[node.name]:
+                    tree.body[i] = self.templates[node.name]
                     changed = True
         for name, template in self.templates.items():
             if name not in seen:
@@ -295,8 +304,7 @@ class AttrFixPattern(MutationPattern):
                 changed = True
         if not changed:
             return None
-        ast.fix_missing_locations(tree)
-        return _module_to_source(tree)
+        return tree
 
 
 PATTERNS = [
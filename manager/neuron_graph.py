@@ -1,9 +1,17 @@
 from __future__ import annotations
 
-import json
+import heapq
+from collections import Counter
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
+from manager import json_io
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None  # type: ignore[assignment]
 
 DEFAULT_GRAPH_PATH = Path("manager/neuron_graph.json")
 GRAPH_VERSION = "0.1"
@@ -14,12 +22,23 @@ class NeuronGraph:
     Lightweight embedding-backed graph for relating plugins, functions, errors, tasks, and reflections.
     """
 
-    def __init__(self, path: Path | str | None = None) -> None:
+    def __init__(self, path: Path | str | None = None, autosave: bool = True) -> None:
         self.path = Path(path) if path else DEFAULT_GRAPH_PATH
+        # With autosave every mutation is persisted immediately; inside batch()
+        # (or with autosave off) writes are deferred until flush().
+        self._autosave = autosave
+        # Bumped on every mutation or reload, so callers can cache derived values per generation.
+        self.generation = 0
+        self._batch_depth = 0
+        self._dirty = False
+        # Edge lookup indices: (source, target) -> position in edges, and
+        # node -> positions of incident edges. Rebuilt via _reindex().
+        self._edge_idx: Dict[Tuple[str, str], int] = {}
+        self._adj: Dict[str, List[int]] = {}
         self.graph: Dict[str, object] = {"version": GRAPH_VERSION, "nodes": {}, "edges": []}
         if self.path.exists():
             try:
-                loaded = json.loads(self.path.read_text(encoding="utf-8"))
+                loaded = json_io.loads(self.path.read_bytes())
                 if isinstance(loaded, dict):
                     self.graph.update(loaded)
             except Exception:
@@ -28,57 +47,160 @@ class NeuronGraph:
         self.graph.setdefault("version", GRAPH_VERSION)
         self.graph.setdefault("nodes", {})
         self.graph.setdefault("edges", [])
+        self._reindex()
+        # Embeddings mirrored into one float32 matrix (node_id -> row) for
+        # similarity queries; built on first use, then kept up to date.
+        self._emb = None
+        self._emb_rows: Dict[str, int] = {}
+        self._emb_ids: List[str] = []
+
+    @property
+    def graph(self) -> Dict[str, object]:
+        return self._graph
+
+    @graph.setter
+    def graph(self, value: Dict[str, object]) -> None:
+        self._graph = value
+        self._reindex()
+        self._emb = None  # rebuilt from the new nodes on the next similarity query
+
+    def _reindex(self) -> None:
+        # Cache the containers themselves; graph.update() on load may have replaced them.
+        self._nodes: Dict[str, Dict[str, object]] = self._graph.setdefault("nodes", {})  # type: ignore[assignment]
+        self._edges: List[Dict[str, object]] = self._graph.setdefault("edges", [])  # type: ignore[assignment]
+        self._edge_idx = {}
+        self._adj = {}
+        self.generation += 1
+        for i, edge in enumerate(self._edges):
+            self._register_edge(i, edge)
+
+    def _register_edge(self, i: int, edge: Dict[str, object]) -> None:
+        source, target = edge.get("source"), edge.get("target")
+        if self._edge_idx.setdefault((source, target), i) != i:
+            return  # duplicate pair in a loaded file; the first one wins, as before
+        self._adj.setdefault(source, []).append(i)
+        if target != source:
+            self._adj.setdefault(target, []).append(i)
 
     @property
     def nodes(self) -> Dict[str, Dict[str, object]]:
-        return self.graph.setdefault("nodes", {})  # type: ignore[return-value]
+        return self._nodes
 
     @property
     def edges(self) -> List[Dict[str, object]]:
-        return self.graph.setdefault("edges", [])  # type: ignore[return-value]
+        return self._edges
 
     def add_node(self, node_id: str, node_type: str, embedding: List[float], metadata: Optional[Dict[str, object]] = None) -> None:
         meta = metadata or {}
-        self.nodes[node_id] = {
+        self._nodes[node_id] = {
             "id": node_id,
             "type": node_type,
             "embedding": list(embedding),
             "meta": meta,
         }
-        self.save()
+        self._index_embedding(node_id, self._nodes[node_id]["embedding"])
+        self._mark_dirty()
+
+    def _index_embedding(self, node_id: str, embedding: List[float]) -> None:
+        if self._emb is None:
+            return
+        row = self._emb_rows.get(node_id)
+        if len(embedding) != self._emb.shape[1]:
+            # the dominant dimension may have shifted; rebuild on next query
+            self._emb = None
+            return
+        if row is None:
+            row = len(self._emb_ids)
+            if row == self._emb.shape[0]:
+                grown = np.empty((max(16, row * 2), self._emb.shape[1]), dtype=np.float32)
+                grown[:row] = self._emb[:row]
+                self._emb = grown
+            self._emb_rows[node_id] = row
+            self._emb_ids.append(node_id)
+        self._emb[row] = embedding
+
+    def _build_embedding_matrix(self) -> None:
+        dims = Counter(len(n.get("embedding") or []) for n in self._nodes.values())
+        dims.pop(0, None)
+        dim = dims.most_common(1)[0][0] if dims else 0
+        ids = [nid for nid, n in self._nodes.items() if dim and len(n.get("embedding") or []) == dim]
+        self._emb_ids = ids
+        self._emb_rows = {nid: row for row, nid in enumerate(ids)}
+        if not dim:
+            self._emb = None  # nothing to index yet; build again once embeddings arrive
+            return
+        self._emb = np.empty((max(16, len(ids)), dim), dtype=np.float32)
+        for row, nid in enumerate(ids):
+            self._emb[row] = self._nodes[nid]["embedding"]
+
+    def topk_similar(self, node_id: str, k: int = 5) -> List[Dict[str, object]]:
+        """
+        Return up to k other nodes ranked by embedding dot product with node_id.
+        Only nodes sharing the dominant embedding dimension are compared.
+        """
+        if np is None:
+            return self._topk_similar_scan(node_id, k)
+        if self._emb is None:
+            self._build_embedding_matrix()
+        row = self._emb_rows.get(node_id)
+        n = len(self._emb_ids)
+        if row is None or k <= 0 or n < 2:
+            return []
+        mat = self._emb[:n]
+        sims = mat @ mat[row]
+        sims[row] = -np.inf
+        take = min(k, n - 1)
+        idx = np.argpartition(-sims, take - 1)[:take]
+        idx = idx[np.argsort(-sims[idx], kind="stable")]
+        return [{"id": self._emb_ids[i], "score": float(sims[i])} for i in idx.tolist()]
+
+    def _topk_similar_scan(self, node_id: str, k: int) -> List[Dict[str, object]]:
+        node = self._nodes.get(node_id)
+        query = [float(v) for v in (node or {}).get("embedding") or []]
+        if not query:
+            return []
+        scored = []
+        for other_id, other in self._nodes.items():
+            emb = other.get("embedding") or []
+            if other_id == node_id or len(emb) != len(query):
+                continue
+            scored.append((sum(a * float(b) for a, b in zip(query, emb)), other_id))
+        return [{"id": nid, "score": score} for score, nid in heapq.nlargest(k, scored, key=lambda t: t[0])]
 
     def add_edge(self, source_id: str, target_id: str, weight: float = 0.0, meta: Optional[Dict[str, object]] = None) -> None:
         meta = meta or {}
-        existing = next((e for e in self.edges if e.get("source") == source_id and e.get("target") == target_id), None)
-        if existing:
+        idx = self._edge_idx.get((source_id, target_id))
+        if idx is not None:
+            existing = self._edges[idx]
             existing["weight"] = weight
             existing_meta = existing.get("meta") or {}
             existing_meta.update(meta)
             existing["meta"] = existing_meta
         else:
-            self.edges.append({"source": source_id, "target": target_id, "weight": float(weight), "meta": meta})
-        self.save()
+            edge = {"source": source_id, "target": target_id, "weight": float(weight), "meta": meta}
+            self._edges.append(edge)
+            self._register_edge(len(self._edges) - 1, edge)
+        self._mark_dirty()
 
     def update_edge_weight(self, source_id: str, target_id: str, delta: float) -> None:
-        existing = next((e for e in self.edges if e.get("source") == source_id and e.get("target") == target_id), None)
-        if not existing:
+        idx = self._edge_idx.get((source_id, target_id))
+        if idx is None:
             self.add_edge(source_id, target_id, weight=delta)
             return
+        existing = self._edges[idx]
         existing["weight"] = float(existing.get("weight", 0.0)) + float(delta)
         # simple clipping to avoid runaway weights
         existing["weight"] = max(min(existing["weight"], 10.0), -10.0)
-        self.save()
+        self._mark_dirty()
 
     def get_neighbors(self, node_id: str, top_k: int = 10, edge_type: str | None = None) -> List[Dict[str, object]]:
+        edges = self._edges
+        incident = sorted(self._adj.get(node_id, ()), key=lambda i: float(edges[i].get("weight", 0.0)), reverse=True)
         neighbors: List[Dict[str, object]] = []
-        for edge in self.edges:
-            if edge.get("source") == node_id:
-                other_id = edge.get("target")
-            elif edge.get("target") == node_id:
-                other_id = edge.get("source")
-            else:
-                continue
-            other = self.nodes.get(str(other_id), {"id": other_id, "type": "unknown", "embedding": [], "meta": {}})
+        for i in incident:
+            edge = edges[i]
+            other_id = edge.get("target") if edge.get("source") == node_id else edge.get("source")
+            other = self._nodes.get(str(other_id), {"id": other_id, "type": "unknown", "embedding": [], "meta": {}})
             if edge_type and other.get("type") != edge_type:
                 continue
             neighbors.append(
@@ -89,25 +211,56 @@ class NeuronGraph:
                     "meta": other.get("meta", {}),
                 }
             )
-        neighbors.sort(key=lambda n: n.get("weight", 0.0), reverse=True)
-        return neighbors[:top_k]
+            if len(neighbors) >= top_k:
+                break
+        return neighbors
+
+    def _mark_dirty(self) -> None:
+        self._dirty = True
+        self.generation += 1
+        if self._autosave and not self._batch_depth:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Persist pending changes, if any.
+        """
+        if self._dirty:
+            self.save()
+
+    @contextmanager
+    def batch(self) -> Iterator["NeuronGraph"]:
+        """
+        Defer writes for the duration of the block and save once at the end.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth and self._autosave:
+                self.flush()
 
     def save(self, path: Path | None = None) -> None:
         out_path = path or self.path
         out_path.parent.mkdir(parents=True, exist_ok=True)
-        out_path.write_text(json.dumps(self.graph, indent=2), encoding="utf-8")
+        out_path.write_bytes(json_io.dumps(self.graph))
+        if out_path == self.path:
+            self._dirty = False
 
     def load(self, path: Path | None = None) -> None:
         src = path or self.path
         if not src.exists():
             return
-        loaded = json.loads(src.read_text(encoding="utf-8"))
+        loaded = json_io.loads(src.read_bytes())
         if not isinstance(loaded, dict):
             return
         self.graph.update(loaded)
+        self._reindex()
+        self._emb = None
 
     def add_concept_if_missing(self, concept_id: str, embedding: Optional[List[float]] = None, meta: Optional[Dict[str, object]] = None) -> None:
-        if concept_id in self.nodes:
+        if concept_id in self._nodes:
             return
         self.add_node(concept_id, "concept", embedding or [0.0] * 8, meta or {})
 
@@ -116,16 +269,18 @@ class NeuronGraph:
         Return a compact subgraph suitable for visualization.
         Filters edges by weight and limits node count.
         """
-        strong_edges = [e for e in self.edges if abs(float(e.get("weight", 0.0))) >= min_weight]
-        strong_edges.sort(key=lambda e: abs(float(e.get("weight", 0.0))), reverse=True)
+        weighted = [(abs(float(e.get("weight", 0.0))), e) for e in self._edges]
+        strong = [we for we in weighted if we[0] >= min_weight]
+        strong.sort(key=lambda we: we[0], reverse=True)
+        strong_edges = [e for _, e in strong]
         nodes: Dict[str, Dict[str, object]] = {}
         for edge in strong_edges:
             for node_id in (edge.get("source"), edge.get("target")):
-                if node_id and node_id in self.nodes:
-                    nodes[node_id] = self.nodes[node_id]
+                if node_id and node_id in self._nodes:
+                    nodes[node_id] = self._nodes[node_id]
         # fallback: include a few nodes even if no edges pass the filter
         if not nodes:
-            for node_id, node in list(self.nodes.items())[: max_nodes]:
+            for node_id, node in list(self._nodes.items())[: max_nodes]:
                 nodes[node_id] = node
         limited_nodes = dict(list(nodes.items())[:max_nodes])
         limited_edges = [
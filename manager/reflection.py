@@ -2,98 +2,190 @@ from __future__ import annotations
 
 import json
 import os
-from typing import Any, Dict, Optional
+import random
+import re
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from manager import json_io
 
 LLM_BASE_URL = os.getenv("MIND_LLM_BASE_URL", "http://127.0.0.1:11434/v1/chat/completions")
 LLM_MODEL = os.getenv("MIND_LLM_MODEL", "llama3.2:1b")
 LLM_TIMEOUT = float(os.getenv("MIND_LLM_TIMEOUT", "300"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("MIND_LLM_CONNECT_TIMEOUT", "3"))
+
+# Server errors get one more attempt after a jittered backoff (connection
+# failures are already retried by the session adapter). After
+# _BREAKER_THRESHOLD consecutive failed calls the LLM is skipped for
+# _BREAKER_COOLDOWN seconds and the local fallback answers instead.
+_ATTEMPTS = 2
+_BREAKER_THRESHOLD = 3
+_BREAKER_COOLDOWN = 30.0
+_fail_count = 0
+_circuit_open_until = 0.0
+
+# Kept byte-identical across calls so the server can reuse its cached prefix.
+_SYSTEM_MSG = (
+    "You are the inner voice of a young self-improving code agent. "
+    "You see a summary of one life step: age, stage, skill, which plugins were selected, "
+    "what actions were taken (patterns tried, accepted/rejected, errors), task status, "
+    "and optionally doc_curriculum entries describing new concepts and tasks derived from Python docs, "
+    "and optionally external knowledge snippets or guidance messages from a human teacher. "
+    "You only know error types as short labels (e.g. 'TypeError', 'AssertionError', or 'Other'); do not invent details not present. "
+    "Always respond in two parts, in this order: "
+    "1) briefly describe what you are doing now based on this step (actions, tasks, successes/failures, and if present the newest doc concept/tasks) using the provided age/stage/skill as-is; "
+    "2) then write 1–2 sentences starting with 'To my teacher:' that directly respond to the MOST RECENT guidance message (or note that none was given), in your own words. "
+    "Be concise and honest about uncertainty. If you see doc_curriculum details (added_concept or mastered_concept), mention what new concept is being added or practiced and whether you feel ready to move on."
+)
+_SYSTEM_MESSAGE = {"role": "system", "content": _SYSTEM_MSG}
+
+# Streamed replies are cut off once the "To my teacher:" part has this many
+# sentences; the first part is never capped. A period after a one-letter word
+# ("e.g. ", "i.e. ") or a common abbreviation does not end a sentence.
+# Cutting off closes the response mid-stream, so that keep-alive connection is
+# dropped and the next call reconnects (a local connect is cheap next to the
+# tokens saved). Draining instead would wait for the server to finish generating,
+# which is exactly the time the early stop saves.
+_TEACHER_SENTENCES = 2
+_TEACHER_MARKER = "To my teacher:"
+_SENTENCE_END = re.compile(r"(?:(?<!\b\w)(?<!\betc)(?<!\bvs)\.|[!?])(?=\s)")
+
+# Shared session so back-to-back reflections reuse the keep-alive connection;
+# created on first use by _get_session().
+_SESSION: Optional[requests.Session] = None
+# Bodies are pre-serialized with json_io, so the content type is set by hand.
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Per-item line templates for _build_prompt; fields are fetched with dict.get.
+_PLUGIN_FIELDS = ("plugin", "total_score", "task_failing_count", "task_avg_streak")
+_PLUGIN_LINE = "{} (score={}, task_failing={}, task_streak={})".format
+_ACTION_FIELDS = ("plugin", "pattern", "result", "error_type")
+_ACTION_LINE = "{} pattern={} result={} error_type={}".format
+_TASK_FIELDS = ("name", "plugin", "streak", "passes", "fails", "last_status", "last_error_type")
+_TASK_LINE = "{}@{} streak={} passes={} fails={} status={} err={}".format
+
+
+def _action_line(a: Dict[str, Any]) -> str:
+    line = _ACTION_LINE(*map(a.get, _ACTION_FIELDS))
+    if "web_consult" in a:
+        wc = a["web_consult"]
+        line += f" web_consult(url={wc.get('url')}, status={wc.get('status')})"
+    return line
+
+
+def _doc_line(ev: Dict[str, Any]) -> str:
+    bits = [ev.get("action", "doc_event"), str(ev.get("concept") or "unknown_concept")]
+    task_files = ev.get("task_files") or ev.get("tasks") or []
+    if task_files:
+        bits.append("tasks=" + ",".join(task_files))
+    snippet = ev.get("doc_snippet")
+    if snippet:
+        bits.append(f"note={snippet}")
+    passes = ev.get("passes")
+    streak = ev.get("streak")
+    if passes is not None:
+        bits.append(f"passes={passes}")
+    if streak is not None:
+        bits.append(f"streak={streak}")
+    return " ".join(str(b) for b in bits if b)
+
+
+def _append_joined(append: Callable[[str], None], label: str, items: Iterable[str]) -> None:
+    # Emit "label: a; b; c" as fragments of the caller's output list.
+    it = iter(items)
+    append(label)
+    append(next(it))
+    for item in it:
+        append("; ")
+        append(item)
 
 
 def _build_prompt(step_summary: Dict[str, Any], external_knowledge: Optional[str]) -> str:
-    age = step_summary.get("age")
-    stage = step_summary.get("stage")
-    skill = step_summary.get("skill")
-    selected_plugins = step_summary.get("selected_plugins", [])
-    actions = step_summary.get("actions", [])
-    tasks = step_summary.get("tasks", [])
+    get = step_summary.get
+    selected_plugins = get("selected_plugins", [])
+    actions = get("actions", [])
+    tasks = get("tasks", [])
 
-    parts = [f"age={age}, stage={stage}, skill={skill}"]
+    # All fragments go into one list and are joined once at the end.
+    out: List[str] = [f"age={get('age')}, stage={get('stage')}, skill={get('skill')}"]
+    append = out.append
 
     if selected_plugins:
-        plugin_lines = []
-        for sel in selected_plugins:
-            plugin_lines.append(
-                f"{sel.get('plugin')} "
-                f"(score={sel.get('total_score')}, "
-                f"task_failing={sel.get('task_failing_count')}, "
-                f"task_streak={sel.get('task_avg_streak')})"
-            )
-        parts.append("selected_plugins: " + "; ".join(plugin_lines))
+        _append_joined(append, "\nselected_plugins: ", (_PLUGIN_LINE(*map(sel.get, _PLUGIN_FIELDS)) for sel in selected_plugins))
 
     if actions:
-        action_lines = []
-        for a in actions:
-            line = (
-                f"{a.get('plugin')} "
-                f"pattern={a.get('pattern')} "
-                f"result={a.get('result')} "
-                f"error_type={a.get('error_type')}"
-            )
-            if "web_consult" in a:
-                wc = a["web_consult"]
-                line += f" web_consult(url={wc.get('url')}, status={wc.get('status')})"
-            action_lines.append(line)
-        parts.append("actions: " + "; ".join(action_lines))
+        _append_joined(append, "\nactions: ", map(_action_line, actions))
 
     if tasks:
-        task_lines = []
-        for t in tasks:
-            task_lines.append(
-                f"{t.get('name')}@{t.get('plugin')} "
-                f"streak={t.get('streak')} "
-                f"passes={t.get('passes')} "
-                f"fails={t.get('fails')} "
-                f"status={t.get('last_status')} "
-                f"err={t.get('last_error_type')}"
-            )
-        parts.append("tasks: " + "; ".join(task_lines))
-
-    doc_events = step_summary.get("doc_curriculum") or []
+        _append_joined(append, "\ntasks: ", (_TASK_LINE(*map(t.get, _TASK_FIELDS)) for t in tasks))
+
+    doc_events = get("doc_curriculum") or []
     if isinstance(doc_events, dict):
         doc_events = [doc_events]
     if doc_events:
-        doc_lines = []
-        for ev in doc_events:
-            bits = [ev.get("action", "doc_event"), str(ev.get("concept") or "unknown_concept")]
-            task_files = ev.get("task_files") or ev.get("tasks") or []
-            if task_files:
-                bits.append("tasks=" + ",".join(task_files))
-            snippet = ev.get("doc_snippet")
-            if snippet:
-                bits.append(f"note={snippet}")
-            passes = ev.get("passes")
-            streak = ev.get("streak")
-            if passes is not None:
-                bits.append(f"passes={passes}")
-            if streak is not None:
-                bits.append(f"streak={streak}")
-            doc_lines.append(" ".join(str(b) for b in bits if b))
-        parts.append("doc_curriculum: " + "; ".join(doc_lines))
+        _append_joined(append, "\ndoc_curriculum: ", map(_doc_line, doc_events))
 
     if external_knowledge:
-        parts.append(f"external_knowledge_snippet: {external_knowledge[:500]}")
-    guidance_items = step_summary.get("guidance") or []
-    last_guidance = step_summary.get("last_guidance")
+        append("\nexternal_knowledge_snippet: ")
+        append(external_knowledge[:500])
+    guidance_items = get("guidance") or []
+    last_guidance = get("last_guidance")
     if guidance_items:
-        parts.append("guidance_messages:")
+        append("\nguidance_messages:")
         for g in guidance_items:
-            parts.append(f"- {g.get('author')}: {g.get('message')}")
+            g_get = g.get
+            append(f"\n- {g_get('author')}: {g_get('message')}")
     if last_guidance:
-        parts.append(f"latest_guidance: {last_guidance.get('author')}: {last_guidance.get('message')}")
+        append(f"\nlatest_guidance: {last_guidance.get('author')}: {last_guidance.get('message')}")
+
+    return "".join(out)
+
 
-    return "\n".join(parts)
+def _get_session() -> requests.Session:
+    global _SESSION
+    if _SESSION is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=Retry(total=1, backoff_factor=0.1))
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers["Connection"] = "keep-alive"
+        _SESSION = session
+    return _SESSION
+
+
+def _read_stream(resp: requests.Response) -> str:
+    """
+    Accumulate an OpenAI-style SSE completion, stopping early once the reply is complete.
+    """
+    if "event-stream" not in resp.headers.get("Content-Type", ""):
+        # server ignored stream=True and sent one JSON body
+        choices = json_io.loads(resp.content).get("choices") or []
+        return (choices[0].get("message", {}) or {}).get("content", "") if choices else ""
+    text = ""
+    for line in resp.iter_lines():
+        if not line.startswith(b"data:"):
+            continue
+        payload = line[5:].strip()
+        if payload == b"[DONE]":
+            break
+        choices = json_io.loads(payload).get("choices") or []
+        if not choices:
+            continue
+        delta = (choices[0].get("delta") or {}).get("content")
+        if not delta:
+            continue
+        text += delta
+        marker = text.find(_TEACHER_MARKER)
+        if marker < 0:
+            continue
+        ends = list(_SENTENCE_END.finditer(text, marker))
+        if len(ends) >= _TEACHER_SENTENCES:
+            return text[: ends[_TEACHER_SENTENCES - 1].end()]
+    return text
 
 
 def _fallback_reflection(step_summary: Dict[str, Any]) -> str:
@@ -132,37 +224,53 @@ def _fallback_reflection(step_summary: Dict[str, Any]) -> str:
     return f"{part_one} {part_two}"
 
 
+def _request_reflection(body: Dict[str, Any]) -> str:
+    timeout = (LLM_CONNECT_TIMEOUT, LLM_TIMEOUT)
+    payload = json_io.dumps(body, indent=False)
+    for attempt in range(_ATTEMPTS):
+        last = attempt + 1 == _ATTEMPTS
+        try:
+            with _get_session().post(LLM_BASE_URL, data=payload, headers=_JSON_HEADERS, timeout=timeout, stream=True) as resp:
+                if resp.status_code < 500 or last:
+                    resp.raise_for_status()
+                    return _read_stream(resp).strip()
+        except requests.exceptions.ChunkedEncodingError:
+            if last:
+                raise
+        time.sleep(min(5.0, 2**attempt + random.random()))
+    return ""
+
+
+def _record_call(ok: bool) -> None:
+    global _fail_count, _circuit_open_until
+    if ok:
+        _fail_count = 0
+        return
+    _fail_count += 1
+    if _fail_count >= _BREAKER_THRESHOLD:
+        _circuit_open_until = time.monotonic() + _BREAKER_COOLDOWN
+        _fail_count = 0
+
+
 def generate_reflection(step_summary: Dict[str, Any], external_knowledge: Optional[str] = None) -> str:
     prompt = _build_prompt(step_summary, external_knowledge)
-    system_msg = (
-        "You are the inner voice of a young self-improving code agent. "
-        "You see a summary of one life step: age, stage, skill, which plugins were selected, "
-        "what actions were taken (patterns tried, accepted/rejected, errors), task status, "
-        "and optionally doc_curriculum entries describing new concepts and tasks derived from Python docs, "
-        "and optionally external knowledge snippets or guidance messages from a human teacher. "
-        "You only know error types as short labels (e.g. 'TypeError', 'AssertionError', or 'Other'); do not invent details not present. "
-        "Always respond in two parts, in this order: "
-        "1) briefly describe what you are doing now based on this step (actions, tasks, successes/failures, and if present the newest doc concept/tasks) using the provided age/stage/skill as-is; "
-        "2) then write 1–2 sentences starting with 'To my teacher:' that directly respond to the MOST RECENT guidance message (or note that none was given), in your own words. "
-        "Be concise and honest about uncertainty. If you see doc_curriculum details (added_concept or mastered_concept), mention what new concept is being added or practiced and whether you feel ready to move on."
-    )
     body = {
         "model": LLM_MODEL,
         "messages": [
-            {"role": "system", "content": system_msg},
+            _SYSTEM_MESSAGE,
             {"role": "user", "content": prompt},
         ],
         "temperature": 0.3,
-        "stream": False,
+        "stream": True,
     }
+    if time.monotonic() < _circuit_open_until:
+        return _fallback_reflection(step_summary)
     try:
-        resp = requests.post(LLM_BASE_URL, json=body, timeout=LLM_TIMEOUT)
-        resp.raise_for_status()
-        data = resp.json()
-        choices = data.get("choices") or []
-        if not choices:
-            return _fallback_reflection(step_summary)
-        content = (choices[0].get("message", {}) or {}).get("content", "").strip()
-        return content or _fallback_reflection(step_summary)
+        content = _request_reflection(body)
     except Exception:
+        _record_call(False)
+        return _fallback_reflection(step_summary)
+    _record_call(True)
+    if not content:
         return _fallback_reflection(step_summary)
+    return content
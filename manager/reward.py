@@ -1,12 +1,40 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Tuple
+import math
+from typing import Any, Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None  # type: ignore[assignment]
 
 REWARD_CLIP = (-2.0, 2.0)
+_LO, _HI = REWARD_CLIP
+
+# Potential-based shaping: F = PBRS_GAMMA * phi(s') - phi(s), with
+# phi(x) = POTENTIAL_SCALE / (1 + exp(-POTENTIAL_SLOPE * x)).
+PBRS_GAMMA = 0.99
+POTENTIAL_SCALE = 1.0
+POTENTIAL_SLOPE = 0.5
 
 
 def _clip(value: float) -> float:
-    return max(min(value, REWARD_CLIP[1]), REWARD_CLIP[0])
+    return _LO if value < _LO else (_HI if value > _HI else value)
+
+
+def task_potential(avg_streak: float, failing_count: float = 0.0) -> float:
+    """
+    Potential of a plugin's task state: a sigmoid of its average streak,
+    pulled down by the number of currently failing tasks.
+    """
+    x = float(avg_streak) - float(failing_count)
+    return POTENTIAL_SCALE / (1.0 + math.exp(-POTENTIAL_SLOPE * x))
+
+
+def _has_potentials(outcome: Dict[str, Any]) -> bool:
+    return isinstance(outcome.get("prev_potential"), (int, float)) and isinstance(
+        outcome.get("next_potential"), (int, float)
+    )
 
 
 def compute_reward(outcome: Dict[str, Any], return_details: bool = False) -> float | Tuple[float, Dict[str, Any]]:
@@ -21,10 +49,13 @@ def compute_reward(outcome: Dict[str, Any], return_details: bool = False) -> flo
       - env_reward: raw environment reward (already scaled)
       - progress: fractional completion progress (0-1)
       - error_type / result: textual hints ("unsafe", "rejected", "noop")
+      - prev_potential / next_potential: task_potential() before and after the action
 
     Reward shaping:
       base reward from success/failure, bonuses for improvements/progress,
       penalties for regressions/unsafe/no-op. Clipped to REWARD_CLIP.
+      When both potentials are given, the improvement and progress bonuses are
+      replaced by the policy-invariant term PBRS_GAMMA * next - prev.
     """
     explicit = outcome.get("reward")
     if isinstance(explicit, (int, float)) and not return_details:
@@ -68,15 +99,25 @@ def compute_reward(outcome: Dict[str, Any], return_details: bool = False) -> flo
     env_component = float(env_reward) if isinstance(env_reward, (int, float)) else 0.0
     progress_component = 0.3 * progress
 
+    potential_shaping = None
+    if _has_potentials(outcome):
+        potential_shaping = PBRS_GAMMA * float(outcome["next_potential"]) - float(outcome["prev_potential"])
+        improvement_bonus = 0.0
+        progress_component = potential_shaping
+
     if soft_explore:
         # exploration without making things worse should be near-neutral
         regression_penalty = 0.0
-        progress_component = max(progress_component, 0.2)
+        if potential_shaping is None:
+            progress_component = max(progress_component, 0.2)
 
     reward = base + improvement_bonus + regression_penalty + env_component + progress_component
     if soft_explore and reward < 0:
         reward = max(reward, -0.05)
     reward = _clip(reward)
+    if not return_details:
+        # explicit rewards already returned above; skip building the breakdown
+        return reward
 
     details = {
         "domain": domain,
@@ -88,6 +129,8 @@ def compute_reward(outcome: Dict[str, Any], return_details: bool = False) -> flo
         "clipped": reward,
         "soft_explore": soft_explore,
     }
+    if potential_shaping is not None:
+        details["potential_shaping"] = potential_shaping
 
     if isinstance(explicit, (int, float)):
         # explicit reward overrides components but still gets clipped
@@ -95,4 +138,64 @@ def compute_reward(outcome: Dict[str, Any], return_details: bool = False) -> flo
         details["explicit"] = float(explicit)
         details["clipped"] = reward
 
-    return (reward, details) if return_details else reward
+    return reward, details
+
+
+def _num(value: Any) -> float:
+    return float(value or 0.0)
+
+
+def compute_reward_batch(outcomes: Sequence[Dict[str, Any]]) -> "np.ndarray | List[float]":
+    """
+    Vectorized compute_reward over many outcomes (same shaping, same clipping).
+    Fields are gathered into columns once and combined with array ops.
+    Returns a float64 array, or a plain list when numpy is unavailable.
+    """
+    if np is None:
+        return [compute_reward(o) for o in outcomes]  # type: ignore[misc]
+    n = len(outcomes)
+
+    def col(values, dtype=bool):
+        return np.fromiter(values, dtype=dtype, count=n)
+
+    tests_ok = [o.get("tests_ok") for o in outcomes]
+    eval_ok = [o.get("eval_ok", t) for o, t in zip(outcomes, tests_ok)]
+    results = [o.get("result") for o in outcomes]
+    explicit = [o.get("reward") for o in outcomes]
+    env = [o.get("env_reward") for o in outcomes]
+
+    tests_true = col(t is True for t in tests_ok)
+    tests_false = col(t is False for t in tests_ok)
+    eval_true = col(e is True for e in eval_ok)
+    eval_false = col(e is False for e in eval_ok)
+    unsafe = col(r == "unsafe" for r in results)
+    rejected = col(r == "rejected" for r in results)
+    weak = col(r in {"rejected", "noop", None} for r in results)
+    is_code = col(o.get("domain", "code") == "code" for o in outcomes)
+    tests_delta = col((_num(o.get("tests_delta", 0.0)) for o in outcomes), float)
+    regressions = col((_num(o.get("regressions", 0.0)) for o in outcomes), float)
+    progress = col((_num(o.get("progress", 0.0)) for o in outcomes), float)
+    env_component = col((float(v) if isinstance(v, (int, float)) else 0.0 for v in env), float)
+    has_explicit = col(isinstance(v, (int, float)) for v in explicit)
+    explicit_vals = col((float(v) if isinstance(v, (int, float)) else 0.0 for v in explicit), float)
+    has_pot = col(_has_potentials(o) for o in outcomes)
+    shaping = col(
+        (PBRS_GAMMA * float(o["next_potential"]) - float(o["prev_potential"]) if p else 0.0 for o, p in zip(outcomes, has_pot)),
+        float,
+    )
+
+    base = tests_true.astype(float) - tests_false
+    base += np.where(eval_true & ~tests_false, 0.2, np.where(eval_false, -0.3, 0.0))
+    base -= np.where(unsafe, 1.5, np.where(weak, 0.2, 0.0))
+
+    soft = is_code & rejected & tests_true & (regressions <= 0) & (tests_delta >= 0)
+    regression_penalty = np.where(soft, 0.0, -0.5 * regressions)
+    progress_component = 0.3 * progress
+    progress_component = np.where(soft, np.maximum(progress_component, 0.2), progress_component)
+    progress_component = np.where(has_pot, shaping, progress_component)
+    improvement_bonus = np.where(has_pot, 0.0, 0.5 * tests_delta)
+
+    reward = base + improvement_bonus + regression_penalty + env_component + progress_component
+    reward = np.where(soft & (reward < 0), np.maximum(reward, -0.05), reward)
+    reward = np.where(has_explicit, explicit_vals, reward)
+    return np.clip(reward, REWARD_CLIP[0], REWARD_CLIP[1])
@@ -1,14 +1,30 @@
 import ast
+from functools import lru_cache
+
+MAX_NODES = 5000
 
 
 def is_safe(code: str) -> bool:
     """
     Basic safety: ensure code parses and is not excessively large.
     """
+    return _is_safe(code)
+
+
+@lru_cache(maxsize=1024)
+def _is_safe(code: str) -> bool:
+    # The same candidate is often re-checked, so verdicts are memoized per source.
     try:
         tree = ast.parse(code)
     except SyntaxError:
         return False
-    # Heuristic size cap to avoid runaway growth.
-    node_count = sum(1 for _ in ast.walk(tree))
-    return node_count < 5000
+    # Heuristic size cap to avoid runaway growth; stop walking once it is hit.
+    count = 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if count >= MAX_NODES:
+            return False
+        stack.extend(ast.iter_child_nodes(node))
+    return True
@@ -1,13 +1,53 @@
 from __future__ import annotations
 
+import ast
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from .concept_miner import task_name_for_concept
 
 TASKS_DIR = Path("tasks")
 PLUGIN_PATH = Path("plugins/sample_plugin.py")
 
+# Function names defined in the plugin and stems of existing task files, each
+# tagged with the (path, mtime_ns, size) they were read at; a burst of new
+# concepts then costs a stat per call instead of a file read or directory probe.
+_PLUGIN_FUNCS: Set[str] = set()
+_PLUGIN_STAMP: Optional[Tuple[Path, int, int]] = None
+_TASK_STEMS: Set[str] = set()
+_TASKS_STAMP: Optional[Tuple[Path, int, int]] = None
+
+
+def _stamp(path: Path) -> Tuple[Path, int, int]:
+    st = path.stat()
+    return path.absolute(), st.st_mtime_ns, st.st_size
+
+
+def _plugin_functions() -> Optional[Set[str]]:
+    """
+    Names of all functions defined in PLUGIN_PATH, or None if it does not parse.
+    """
+    global _PLUGIN_FUNCS, _PLUGIN_STAMP
+    stamp = _stamp(PLUGIN_PATH)
+    if stamp != _PLUGIN_STAMP:
+        try:
+            tree = ast.parse(PLUGIN_PATH.read_bytes())
+        except SyntaxError:
+            return None
+        _PLUGIN_FUNCS = {n.name for n in ast.walk(tree) if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))}
+        _PLUGIN_STAMP = stamp
+    return _PLUGIN_FUNCS
+
+
+def _task_stems() -> Set[str]:
+    global _TASK_STEMS, _TASKS_STAMP
+    # adding or removing a file bumps the directory mtime
+    stamp = _stamp(TASKS_DIR)
+    if stamp != _TASKS_STAMP:
+        _TASK_STEMS = {p.stem for p in TASKS_DIR.glob("*.yml")}
+        _TASKS_STAMP = stamp
+    return _TASK_STEMS
+
 
 def _task_to_yaml(spec: Dict[str, Any]) -> str:
     lines = [
@@ -24,17 +64,11 @@ def _task_to_yaml(spec: Dict[str, Any]) -> str:
     return "\n".join(lines) + "\n"
 
 
-def _task_spec_for_concept(concept: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-    """
-    Map a concept to a concrete task and stub implementation.
-    Returns None when the concept is not supported yet.
-    """
-    name = concept.get("name") or concept.get("id") or ""
-    task_name = task_name_for_concept(concept)
-
-    if name in {"len", "builtin.len"}:
-        return {
-            "name": task_name,
+# Concept name aliases -> task template; the task name is filled in per concept.
+_SPEC_TABLE = [
+    (
+        ("len", "builtin.len"),
+        {
             "phase": 1,
             "difficulty": 1,
             "target_plugin": "sample_plugin.py",
@@ -51,11 +85,11 @@ def _task_spec_for_concept(concept: Dict[str, Any]) -> Optional[Dict[str, Any]]:
                 "def use_len(obj):",
                 "    return len(obj)",
             ],
-        }
-
-    if name in {"sum", "builtin.sum"}:
-        return {
-            "name": task_name,
+        },
+    ),
+    (
+        ("sum", "builtin.sum"),
+        {
             "phase": 1,
             "difficulty": 1,
             "target_plugin": "sample_plugin.py",
@@ -74,11 +108,11 @@ def _task_spec_for_concept(concept: Dict[str, Any]) -> Optional[Dict[str, Any]]:
                 "        return start",
                 "    return sum(values, start)",
             ],
-        }
-
-    if name in {"min", "builtin.min"}:
-        return {
-            "name": task_name,
+        },
+    ),
+    (
+        ("min", "builtin.min"),
+        {
             "phase": 1,
             "difficulty": 1,
             "target_plugin": "sample_plugin.py",
@@ -94,11 +128,11 @@ def _task_spec_for_concept(concept: Dict[str, Any]) -> Optional[Dict[str, Any]]:
                 "def use_min(values):",
                 "    return min(values)",
             ],
-        }
-
-    if name in {"max", "builtin.max"}:
-        return {
-            "name": task_name,
+        },
+    ),
+    (
+        ("max", "builtin.max"),
+        {
             "phase": 1,
             "difficulty": 1,
             "target_plugin": "sample_plugin.py",
@@ -114,11 +148,11 @@ def _task_spec_for_concept(concept: Dict[str, Any]) -> Optional[Dict[str, Any]]:
                 "def use_max(values):",
                 "    return max(values)",
             ],
-        }
-
-    if name in {"abs", "builtin.abs"}:
-        return {
-            "name": task_name,
+        },
+    ),
+    (
+        ("abs", "builtin.abs"),
+        {
             "phase": 1,
             "difficulty": 1,
             "target_plugin": "sample_plugin.py",
@@ -133,11 +167,11 @@ def _task_spec_for_concept(concept: Dict[str, Any]) -> Optional[Dict[str, Any]]:
                 "def use_abs(value):",
                 "    return abs(value)",
             ],
-        }
-
-    if name in {"any", "builtin.any"}:
-        return {
-            "name": task_name,
+        },
+    ),
+    (
+        ("any", "builtin.any"),
+        {
             "phase": 1,
             "difficulty": 1,
             "target_plugin": "sample_plugin.py",
@@ -152,11 +186,11 @@ def _task_spec_for_concept(concept: Dict[str, Any]) -> Optional[Dict[str, Any]]:
                 "def use_any(values):",
                 "    return any(values)",
             ],
-        }
-
-    if name in {"all", "builtin.all"}:
-        return {
-            "name": task_name,
+        },
+    ),
+    (
+        ("all", "builtin.all"),
+        {
             "phase": 1,
             "difficulty": 1,
             "target_plugin": "sample_plugin.py",
@@ -171,11 +205,11 @@ def _task_spec_for_concept(concept: Dict[str, Any]) -> Optional[Dict[str, Any]]:
                 "def use_all(values):",
                 "    return all(values)",
             ],
-        }
-
-    if name in {"sorted", "builtin.sorted"}:
-        return {
-            "name": task_name,
+        },
+    ),
+    (
+        ("sorted", "builtin.sorted"),
+        {
             "phase": 1,
             "difficulty": 1,
             "target_plugin": "sample_plugin.py",
@@ -190,11 +224,11 @@ def _task_spec_for_concept(concept: Dict[str, Any]) -> Optional[Dict[str, Any]]:
                 "def use_sorted(values):",
                 "    return sorted(values)",
             ],
-        }
-
-    if name in {"list.append", "list_append"}:
-        return {
-            "name": task_name,
+        },
+    ),
+    (
+        ("list.append", "list_append"),
+        {
             "phase": 1,
             "difficulty": 1,
             "target_plugin": "sample_plugin.py",
@@ -211,11 +245,11 @@ def _task_spec_for_concept(concept: Dict[str, Any]) -> Optional[Dict[str, Any]]:
                 "    result.append(item)",
                 "    return result",
             ],
-        }
-
-    if name in {"dict.get", "dict_get"}:
-        return {
-            "name": task_name,
+        },
+    ),
+    (
+        ("dict.get", "dict_get"),
+        {
             "phase": 1,
             "difficulty": 1,
             "target_plugin": "sample_plugin.py",
@@ -231,20 +265,46 @@ def _task_spec_for_concept(concept: Dict[str, Any]) -> Optional[Dict[str, Any]]:
                 "    data = mapping or {}",
                 "    return data.get(key, default)",
             ],
-        }
+        },
+    ),
+]
+_SPEC_TEMPLATES: Dict[str, Dict[str, Any]] = {alias: tpl for aliases, tpl in _SPEC_TABLE for alias in aliases}
+
 
-    return None
+def _task_spec_for_concept(concept: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Map a concept to a concrete task and stub implementation.
+    Returns None when the concept is not supported yet.
+    """
+    name = concept.get("name") or concept.get("id") or ""
+    tpl = _SPEC_TEMPLATES.get(name)
+    if tpl is None:
+        return None
+    return {
+        **tpl,
+        "name": task_name_for_concept(concept),
+        "requirements": list(tpl["requirements"]),
+        "impl": list(tpl["impl"]),
+    }
 
 
 def _ensure_plugin_function(func_name: str, impl_lines: List[str]) -> bool:
+    global _PLUGIN_STAMP
     if not PLUGIN_PATH.exists():
         return False
-    src = PLUGIN_PATH.read_text(encoding="utf-8")
-    if f"def {func_name}(" in src:
+    funcs = _plugin_functions()
+    if funcs is None:
+        # plugin is mid-edit and does not parse; fall back to a text probe
+        if f"def {func_name}(" in PLUGIN_PATH.read_text(encoding="utf-8"):
+            return False
+    elif func_name in funcs:
         return False
     snippet = "\n".join(impl_lines)
     with PLUGIN_PATH.open("a", encoding="utf-8") as f:
         f.write("\n\n" + snippet + "\n")
+    if funcs is not None:
+        funcs.add(func_name)
+        _PLUGIN_STAMP = _stamp(PLUGIN_PATH)
     return True
 
 
@@ -256,14 +316,17 @@ def ensure_tasks_for_concept(concept: Dict[str, Any]) -> List[str]:
     spec = _task_spec_for_concept(concept)
     if not spec:
         return []
-    TASKS_DIR.mkdir(parents=True, exist_ok=True)
+    if not TASKS_DIR.is_dir():
+        TASKS_DIR.mkdir(parents=True, exist_ok=True)
     created: List[str] = []
 
-    task_path = TASKS_DIR / f"{spec['name']}.yml"
-    if not task_path.exists():
+    stems = _task_stems()
+    if spec["name"] not in stems:
+        task_path = TASKS_DIR / f"{spec['name']}.yml"
         task_yaml = _task_to_yaml(spec)
         task_path.write_text(task_yaml, encoding="utf-8")
         created.append(str(task_path))
+        stems.add(spec["name"])
 
     _ensure_plugin_function(spec["target_function"], spec.get("impl", []))
     return created
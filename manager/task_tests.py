@@ -2,12 +2,13 @@ import os
 from pathlib import Path
 from typing import List, Dict
 from manager.curriculum import Curriculum
+from manager.file_cache import StatCache
 
 TASKS_DIR = Path("tasks")
 GENERATED_DIR = Path("tests/generated")
 
 
-def _parse_task_file(path: Path) -> Dict:
+def _parse_task_file(path: Path, st: os.stat_result) -> Dict:
     data = {"requirements": [], "prerequisites": []}
     current_list = None
     for line in path.read_text(encoding="utf-8").splitlines():
@@ -37,37 +38,48 @@ def _parse_task_file(path: Path) -> Dict:
     return data
 
 
+# parsed task per file; unchanged files are not re-parsed
+_PARSE_CACHE: "StatCache[Dict]" = StatCache(_parse_task_file)
+
+
+def _cached_task_file(path: Path) -> Dict:
+    data = _PARSE_CACHE.get(path)
+    # callers keep references to the lists (e.g. curriculum prerequisites), so hand out copies
+    return {k: list(v) if isinstance(v, list) else v for k, v in data.items()}
+
+
 def load_tasks() -> List[Dict]:
     tasks: List[Dict] = []
     if not TASKS_DIR.exists():
+        _PARSE_CACHE.clear()
         return tasks
-    for path in TASKS_DIR.glob("*.yml"):
-        task = _parse_task_file(path)
+    paths = list(TASKS_DIR.glob("*.yml"))
+    _PARSE_CACHE.prune(paths)
+    for path in paths:
+        task = _cached_task_file(path)
         if "name" in task and "target_plugin" in task and "target_function" in task:
             tasks.append(task)
     return tasks
 
 
+_TEST_HEADER = (
+    "import sys\n"
+    "from pathlib import Path\n"
+    "\n"
+    "ROOT = Path(__file__).resolve().parents[2]\n"
+    "if str(ROOT) not in sys.path:\n"
+    "    sys.path.insert(0, str(ROOT))\n"
+    "from plugins.{plugin} import {func}\n"
+)
+
+
 def _task_to_test_source(task: Dict) -> str:
     name = task["name"]
     plugin = task["target_plugin"].replace(".py", "")
     func = task["target_function"]
     reqs = task.get("requirements", [])
-    lines = [
-        "import sys",
-        "from pathlib import Path",
-        "",
-        "ROOT = Path(__file__).resolve().parents[2]",
-        "if str(ROOT) not in sys.path:",
-        "    sys.path.insert(0, str(ROOT))",
-        f"from plugins.{plugin} import {func}",
-        "",
-    ]
-    for idx, req in enumerate(reqs, 1):
-        lines.append(f"def test_{name}_{idx}():")
-        lines.append(f"    assert {req}")
-        lines.append("")
-    return "\n".join(lines)
+    body = "".join(f"\ndef test_{name}_{idx}():\n    assert {req}\n" for idx, req in enumerate(reqs, 1))
+    return _TEST_HEADER.format(plugin=plugin, func=func) + body
 
 
 def regenerate_task_tests(curriculum: Curriculum) -> List[Dict]:
@@ -79,13 +91,20 @@ def regenerate_task_tests(curriculum: Curriculum) -> List[Dict]:
         if curriculum.state["task_status"].get(name, {}).get("status") in {"unlocked", "mastered"}
     }
     GENERATED_DIR.mkdir(parents=True, exist_ok=True)
-    # clear existing generated tests
+    wanted = {GENERATED_DIR / f"test_{name}.py": task for name, task in active.items()}
+    # remove generated tests whose task is no longer active
     for old in GENERATED_DIR.glob("test_*.py"):
-        old.unlink()
-    for task in active.values():
-        test_src = _task_to_test_source(task)
-        out_path = GENERATED_DIR / f"test_{task['name']}.py"
-        out_path.write_text(test_src, encoding="utf-8")
+        if old not in wanted:
+            old.unlink()
+    for out_path, task in wanted.items():
+        test_src = _task_to_test_source(task).encode("utf-8")
+        # leave unchanged files alone so their mtime (and pytest's caches) stay valid
+        try:
+            if out_path.read_bytes() == test_src:
+                continue
+        except FileNotFoundError:
+            pass
+        out_path.write_bytes(test_src)
     return list(active.values())
 
 
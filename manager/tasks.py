@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 import yaml
 
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:  # pragma: no cover - PyYAML built without libyaml
+    from yaml import SafeLoader as _Loader  # type: ignore[assignment]
+
+from manager.file_cache import StatCache
+
 
 TASKS_DIR = Path("tasks")
 
@@ -22,16 +30,35 @@ class Task:
     category: str = "general"
 
 
+def _parse_task_file(path: Path, st: os.stat_result) -> Optional[Dict[str, Any]]:
+    try:
+        data = yaml.load(path.read_bytes(), Loader=_Loader)
+    except Exception:
+        data = None
+    return data if isinstance(data, dict) else None
+
+
+# parsed mapping (or None) per file; unchanged files are not re-parsed
+_PARSE_CACHE: "StatCache[Optional[Dict[str, Any]]]" = StatCache(_parse_task_file)
+
+
+def _read_task_file(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return _PARSE_CACHE.get(path)
+    except OSError:
+        return None
+
+
 def load_tasks() -> Dict[str, Task]:
     tasks: Dict[str, Task] = {}
     if not TASKS_DIR.exists():
+        _PARSE_CACHE.clear()
         return tasks
-    for path in TASKS_DIR.glob("*.yml"):
-        try:
-            data = yaml.safe_load(path.read_text(encoding="utf-8"))
-        except Exception:
-            continue
-        if not isinstance(data, dict):
+    paths = list(TASKS_DIR.glob("*.yml"))
+    _PARSE_CACHE.prune(paths)
+    for path in paths:
+        data = _read_task_file(path)
+        if data is None:
             continue
         name = data.get("name")
         target_plugin = data.get("target_plugin")
@@ -1,15 +1,31 @@
 from __future__ import annotations
 
+import atexit
+import heapq
+import weakref
 from pathlib import Path
-from typing import Dict, Any, List
-
-import json
+from typing import Dict, Any, List, Optional, Set, Tuple
 
+from . import json_io
 from .tasks import Task, tasks_by_plugin
 
 
 TASK_STATE_FILE = Path("manager/tasks_state.json")
 TASK_STATE_VERSION = "1.0"
+# Updates are written out every FLUSH_EVERY saves; flush() (also run at exit) writes the rest.
+FLUSH_EVERY = 50
+_EMPTY: Dict[str, Any] = {}
+_META_KEYS = frozenset(("phase", "difficulty", "category", "plugin"))
+
+# Managers still alive at exit get their pending updates flushed. Held weakly, so a
+# replaced manager (flushed by whoever replaced it) is not kept around until exit.
+_LIVE: "weakref.WeakSet[TaskStateManager]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_live() -> None:
+    for manager in list(_LIVE):
+        manager.flush()
 
 
 class TaskStateManager:
@@ -23,71 +39,128 @@ class TaskStateManager:
 
     def __init__(self, tasks: Dict[str, Task]) -> None:
         self.tasks = tasks
-        self.by_plugin = tasks_by_plugin(tasks)
+        # read-only after construction, so kept as tuples
+        self.by_plugin: Dict[str, Tuple[str, ...]] = {k: tuple(v) for k, v in tasks_by_plugin(tasks).items()}
         self.state: Dict[str, Any] = {}
+        self._dirty = False
+        self._writes_since_flush = 0
+        # pinned to an absolute path: the atexit flush may run after the cwd has changed
+        self.path = TASK_STATE_FILE.absolute()
 
-        if TASK_STATE_FILE.exists():
-            try:
-                loaded = json.loads(TASK_STATE_FILE.read_text(encoding="utf-8"))
-                if isinstance(loaded, dict):
-                    self.state = loaded
-            except Exception:
-                self.state = {}
+        try:
+            loaded = json_io.load_path(self.path)
+            if isinstance(loaded, dict):
+                self.state = loaded
+        except FileNotFoundError:
+            pass
+        except Exception:
+            self.state = {}
 
+        # only write back at startup if merging below actually changed the loaded state
+        changed = "_version" not in self.state
         self.state.setdefault("_version", TASK_STATE_VERSION)
 
         for name, task in tasks.items():
-            s = self.state.setdefault(
-                name,
-                {
-                    "passes": 0,
-                    "fails": 0,
-                    "streak": 0,
-                    "last_status": "unknown",
-                    "last_error_type": "unknown",
-                    "phase": getattr(task, "phase", 1),
-                    "difficulty": getattr(task, "difficulty", 1),
-                    "category": getattr(task, "category", "general"),
-                    "plugin": getattr(task, "target_plugin", None),
-                },
-            )
-            # refresh metadata when tasks change over time
-            s.setdefault("phase", getattr(task, "phase", 1))
-            s.setdefault("difficulty", getattr(task, "difficulty", 1))
-            s.setdefault("category", getattr(task, "category", "general"))
-            s.setdefault("plugin", getattr(task, "target_plugin", None))
+            s = self.state.get(name)
+            if s is None:
+                s = self.state[name] = self._default_state(task)
+                changed = True
+            elif not _META_KEYS <= s.keys():
+                # refresh metadata when tasks change over time
+                s.setdefault("phase", getattr(task, "phase", 1))
+                s.setdefault("difficulty", getattr(task, "difficulty", 1))
+                s.setdefault("category", getattr(task, "category", "general"))
+                s.setdefault("plugin", getattr(task, "target_plugin", None))
+                changed = True
 
         # drop tasks no longer present
         stale = [k for k in self.state.keys() if k not in tasks and not k.startswith("_")]
         for k in stale:
             self.state.pop(k, None)
+        changed = changed or bool(stale)
 
-        self._save()
+        # plugin -> running {"sum_streak", "failing"} over its tasks, kept current by
+        # _record_task_result so plugin_task_stats does not rescan every task.
+        self._plugin_agg: Dict[str, Dict[str, float]] = {}
+        for plugin, names in self.by_plugin.items():
+            tot = 0.0
+            fail = 0
+            for t in names:
+                info = self.state.get(t, _EMPTY)
+                tot += float(info.get("streak", 0))
+                fail += info.get("last_status") == "failing"
+            self._plugin_agg[plugin] = {"sum_streak": tot, "failing": float(fail)}
+
+        # get_weakest_task heap of (streak - passes, state position, name) with lazy
+        # deletion: an entry is live only while its score matches _weak_score[name].
+        # The position keeps ties resolving to the earliest task, as the old scan did.
+        self._weak_pos: Dict[str, int] = {}
+        self._weak_score: Dict[str, float] = {}
+        self._weak_heap: List[Tuple[float, int, str]] = []
+        for name, info in self.state.items():
+            if not name.startswith("_"):
+                self._weak_pos[name] = len(self._weak_pos)
+                self._weak_score[name] = self._weakness(info)
+        self._rebuild_weak_heap()
+
+        # summary() rows, rebuilt lazily; only tasks touched since the last call are refreshed
+        self._summary_cache: Optional[List[Dict[str, Any]]] = None
+        self._summary_index: Dict[str, int] = {}
+        self._dirty_tasks: Set[str] = set()
+
+        if changed:
+            self._save()
+        _LIVE.add(self)
 
     def _save(self) -> None:
-        TASK_STATE_FILE.write_text(json.dumps(self.state, indent=2), encoding="utf-8")
+        self._dirty = True
+        self._writes_since_flush += 1
+        if self._writes_since_flush >= FLUSH_EVERY:
+            self._write(indent=False)
+
+    def flush(self) -> None:
+        """
+        Write pending state to disk, if anything changed since the last write.
+        """
+        if self._dirty:
+            self._write()
+
+    def _write(self, indent: bool = True) -> None:
+        json_io.dump_path(self.path, self.state, indent=indent)
+        self._dirty = False
+        self._writes_since_flush = 0
+
+    @staticmethod
+    def _default_state(task: Optional[Task]) -> Dict[str, Any]:
+        # getattr defaults also cover task=None (results for unknown task names)
+        return {
+            "passes": 0,
+            "fails": 0,
+            "streak": 0,
+            "last_status": "unknown",
+            "last_error_type": "unknown",
+            "phase": getattr(task, "phase", 1),
+            "difficulty": getattr(task, "difficulty", 1),
+            "category": getattr(task, "category", "general"),
+            "plugin": getattr(task, "target_plugin", None),
+        }
 
     def record_plugin_result(self, plugin_name: str, success: bool, error_type: str) -> None:
-        for tname in self.by_plugin.get(plugin_name, []):
-            self._record_task_result(tname, success, error_type)
+        names = self.by_plugin.get(plugin_name)
+        if not names:
+            return  # nothing recorded, nothing to save
+        record = self._record_task_result
+        for tname in names:
+            record(tname, success, error_type)
         self._save()
 
     def _record_task_result(self, task_name: str, success: bool, error_type: str) -> None:
         task_obj = self.tasks.get(task_name)
-        s = self.state.setdefault(
-            task_name,
-            {
-                "passes": 0,
-                "fails": 0,
-                "streak": 0,
-                "last_status": "unknown",
-                "last_error_type": "unknown",
-                "phase": getattr(task_obj, "phase", 1) if task_obj else 1,
-                "difficulty": getattr(task_obj, "difficulty", 1) if task_obj else 1,
-                "category": getattr(task_obj, "category", "general") if task_obj else "general",
-                "plugin": getattr(task_obj, "target_plugin", None) if task_obj else None,
-            },
-        )
+        s = self.state.get(task_name)
+        if s is None:
+            s = self.state[task_name] = self._default_state(task_obj)
+        prev_streak = float(s.get("streak", 0))
+        prev_failing = s.get("last_status") == "failing"
         if success:
             s["passes"] += 1
             s["streak"] = s["streak"] + 1 if s.get("streak", 0) > 0 else 1
@@ -98,62 +171,95 @@ class TaskStateManager:
             s["streak"] = s["streak"] - 1 if s.get("streak", 0) < 0 else -1
             s["last_status"] = "failing"
             s["last_error_type"] = error_type or "Other"
+        agg = self._plugin_agg.get(task_obj.target_plugin) if task_obj else None
+        if agg is not None:
+            agg["sum_streak"] += float(s["streak"]) - prev_streak
+            agg["failing"] += float(not success) - float(prev_failing)
+        self._dirty_tasks.add(task_name)
+        if not task_name.startswith("_"):
+            self._push_weakness(task_name, s)
 
     def record_task_results(self, results: Dict[str, tuple[bool, str]]) -> None:
         """
         Record per-task outcomes in bulk.
         """
+        if not results:
+            return
         for tname, (success, err) in results.items():
             self._record_task_result(tname, success, err)
         self._save()
 
     def plugin_task_stats(self, plugin_name: str) -> Dict[str, float]:
-        task_names = self.by_plugin.get(plugin_name, [])
+        task_names = self.by_plugin.get(plugin_name, ())
         if not task_names:
             return {
                 "task_count": 0.0,
                 "avg_streak": 0.0,
                 "failing_count": 0.0,
             }
-        streaks = []
-        failing = 0
-        for tname in task_names:
-            s = self.state.get(tname, {})
-            streaks.append(float(s.get("streak", 0)))
-            if s.get("last_status") == "failing":
-                failing += 1
-        avg_streak = sum(streaks) / len(streaks) if streaks else 0.0
+        agg = self._plugin_agg[plugin_name]
         return {
             "task_count": float(len(task_names)),
-            "avg_streak": avg_streak,
-            "failing_count": float(failing),
+            "avg_streak": agg["sum_streak"] / len(task_names),
+            "failing_count": agg["failing"],
+        }
+
+    def _summary_row(self, tname: str, task: Task) -> Dict[str, Any]:
+        s = self.state.get(tname, _EMPTY)
+        return {
+            "name": tname,
+            "plugin": task.target_plugin,
+            "streak": s.get("streak", 0),
+            "passes": s.get("passes", 0),
+            "fails": s.get("fails", 0),
+            "last_status": s.get("last_status", "unknown"),
+            "last_error_type": s.get("last_error_type", "unknown"),
         }
 
+    def _summary_rows(self) -> List[Dict[str, Any]]:
+        rows = self._summary_cache
+        if rows is None:
+            rows = [self._summary_row(tname, task) for tname, task in self.tasks.items()]
+            self._summary_index = {tname: i for i, tname in enumerate(self.tasks)}
+            self._summary_cache = rows
+        else:
+            index = self._summary_index
+            for tname in self._dirty_tasks:
+                i = index.get(tname)
+                if i is not None:
+                    # swap in a new row so lists handed out earlier keep their snapshot
+                    rows[i] = self._summary_row(tname, self.tasks[tname])
+        self._dirty_tasks.clear()
+        return rows
+
     def summary(self) -> List[Dict[str, Any]]:
-        items: List[Dict[str, Any]] = []
-        for tname, task in self.tasks.items():
-            s = self.state.get(tname, {})
-            items.append(
-                {
-                    "name": tname,
-                    "plugin": task.target_plugin,
-                    "streak": s.get("streak", 0),
-                    "passes": s.get("passes", 0),
-                    "fails": s.get("fails", 0),
-                    "last_status": s.get("last_status", "unknown"),
-                    "last_error_type": s.get("last_error_type", "unknown"),
-                }
-            )
-        return items
+        return list(self._summary_rows())
+
+    @staticmethod
+    def _weakness(info: Dict[str, Any]) -> float:
+        return float(info.get("streak", 0)) - float(info.get("passes", 0))
+
+    def _rebuild_weak_heap(self) -> None:
+        pos = self._weak_pos
+        self._weak_heap = [(score, pos[name], name) for name, score in self._weak_score.items()]
+        heapq.heapify(self._weak_heap)
+
+    def _push_weakness(self, name: str, info: Dict[str, Any]) -> None:
+        pos = self._weak_pos.setdefault(name, len(self._weak_pos))
+        score = self._weakness(info)
+        if self._weak_score.get(name) == score:
+            return
+        self._weak_score[name] = score
+        heapq.heappush(self._weak_heap, (score, pos, name))
+        # stale entries pile up between lookups; compact once they dominate
+        if len(self._weak_heap) > 4 * len(self._weak_score) + 64:
+            self._rebuild_weak_heap()
 
     def get_weakest_task(self):
-        weakest = None
-        worst = float("inf")
-        for name, info in self.state.items():
-            if name.startswith("_"):
-                continue
-            score = float(info.get("streak", 0)) - float(info.get("passes", 0))
-            if score < worst:
-                worst = score
-                weakest = name
-        return weakest
+        heap = self._weak_heap
+        while heap:
+            score, _, name = heap[0]
+            if self._weak_score.get(name) == score:
+                return name
+            heapq.heappop(heap)
+        return None
@@ -2,7 +2,9 @@ from __future__ import annotations
 
 import importlib
 import sys
+from functools import lru_cache
 from pathlib import Path
+from types import CodeType
 from typing import Dict, List, Tuple
 
 from manager.tasks import Task, load_tasks
@@ -15,7 +17,11 @@ if str(ROOT) not in sys.path:
 DEFAULT_ERROR = "Other"
 MAX_TRY_DEPTH = 2
 
+# Requirement expression -> compiled code; the same requirements are evaluated on every run.
+_EXPR_CACHE: Dict[str, CodeType] = {}
 
+
+@lru_cache(maxsize=256)
 def _plugin_module_name(plugin_path: str) -> str:
     """
     Convert a plugin file name like 'sample_plugin.py' to an importable module name.
@@ -23,6 +29,13 @@ def _plugin_module_name(plugin_path: str) -> str:
     return Path(plugin_path).stem
 
 
+@lru_cache(maxsize=256)
+def _import_plugin(module_name: str):
+    # import_module would return the sys.modules entry anyway; this skips the import lock.
+    # Failed imports raise and are not cached, so they are retried next run.
+    return importlib.import_module(f"plugins.{module_name}")
+
+
 def classify_error(exc: Exception | None) -> str:
     if exc is None:
         return DEFAULT_ERROR
@@ -43,7 +56,10 @@ def _build_eval_env(module, target_function: str | None) -> Dict[str, object]:
 
 def _evaluate_requirement(expr: str, env: Dict[str, object]) -> Tuple[bool, str]:
     try:
-        result = eval(expr, env, {})
+        code = _EXPR_CACHE.get(expr)
+        if code is None:
+            code = _EXPR_CACHE[expr] = compile(expr, "<string>", "eval")
+        result = eval(code, env, {})
         if result is True:
             return True, "OK"
         return False, "AssertionError"
@@ -53,15 +69,39 @@ def _evaluate_requirement(expr: str, env: Dict[str, object]) -> Tuple[bool, str]
         return False, classify_error(exc)
 
 
-def _run_single_task(task: Task) -> Tuple[bool, str]:
+def _plugin_env(plugin_path: str, cache: Dict[str, object]) -> Dict[str, object]:
+    """
+    Import a plugin and build its shared eval env, once per plugin for a run.
+    A failed import is cached too and re-raised for every task of that plugin.
+    """
+    entry = cache.get(plugin_path)
+    if entry is None:
+        try:
+            module = _import_plugin(_plugin_module_name(plugin_path))
+            entry = (module, _build_eval_env(module, None))
+        except Exception as exc:  # pylint: disable=broad-except
+            entry = exc
+        cache[plugin_path] = entry
+    if isinstance(entry, Exception):
+        raise entry
+    return entry
+
+
+def _run_single_task(task: Task, cache: Dict[str, object] | None = None) -> Tuple[bool, str]:
     try:
-        module_name = _plugin_module_name(task.target_plugin)
-        module = importlib.import_module(f"plugins.{module_name}")
+        module, base_env = _plugin_env(task.target_plugin, {} if cache is None else cache)
     except Exception as exc:  # pylint: disable=broad-except
         return False, classify_error(exc)
 
     try:
-        env = _build_eval_env(module, task.target_function)
+        env = base_env
+        target = task.target_function
+        if target:
+            func = getattr(module, target)
+            if env.get(target) is not func:
+                # private or shadowed target: give this task its own env
+                env = dict(base_env)
+                env[target] = func
     except Exception as exc:  # pylint: disable=broad-except
         return False, classify_error(exc)
 
@@ -125,8 +165,9 @@ def run_tests(plugin_name: str | None = None) -> tuple[bool, str, List[str], Dic
 
     overall_error = "OK"
     all_passed = True
+    env_cache: Dict[str, object] = {}
     for tname, task in tasks.items():
-        passed, err_type = _run_single_task(task)
+        passed, err_type = _run_single_task(task, env_cache)
         results[tname] = (passed, err_type)
         if not passed:
             failing.append(tname)
@@ -1,15 +1,36 @@
 from __future__ import annotations
 
-import json
+import atexit
 import os
+import weakref
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None  # type: ignore[assignment]
+
+from manager import json_io
 from manager.neuron_graph import NeuronGraph
 from manager.metrics import Metrics
 
 
 VALUE_STATE_FILE = Path("manager/value_function_state.json")
+# Below this many dimensions the plain Python sum beats the numpy conversion
+# overhead (measured: 3.0us vs 4.8us at 32 dims, 8.5us vs 7.3us at 128), so the
+# default 32-dim embeddings stay on the Python path.
+_NP_MIN_DIM = 128
+
+# Instances still alive at exit get their pending updates flushed; held weakly, as
+# in tasks_state, so a dropped ValueFunction is not kept around until exit.
+_LIVE: "weakref.WeakSet[ValueFunction]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_live() -> None:
+    for vf in list(_LIVE):
+        vf.flush()
 
 
 class ValueFunction:
@@ -21,27 +42,64 @@ class ValueFunction:
         self.neuron_graph = neuron_graph
         self.metrics = metrics
         self.alpha = alpha if alpha is not None else float(os.getenv("VALUE_ALPHA", "0.6"))
+        # Updates are written every save_every calls; flush() (also run at exit) writes the rest.
+        self.save_every = max(1, int(os.getenv("VALUE_SAVE_EVERY", "32")))
+        self._dirty = False
+        self._updates_since_save = 0
+        # absolute for the same reason as TaskStateManager.path
+        self.path = VALUE_STATE_FILE.absolute()
         self.state: Dict[str, Dict[str, float]] = {"plugins": {}, "strategies": {}, "concepts": {}}
-        if VALUE_STATE_FILE.exists():
+        if self.path.exists():
             try:
-                loaded = json.loads(VALUE_STATE_FILE.read_text(encoding="utf-8"))
+                loaded = json_io.load_path(self.path)
                 if isinstance(loaded, dict):
                     self.state.update(loaded)
             except Exception:
                 pass
+        # Memoized component scores. Embedding scores hold for one neuron graph
+        # generation; historical scores are dropped by the update that changes them.
+        self._embed_cache: Dict[str, float] = {}
+        self._embed_gen = -1
+        self._hist_cache: Dict[Tuple[str, str], float] = {}
         self._save()
+        _LIVE.add(self)
 
     def _save(self) -> None:
-        VALUE_STATE_FILE.write_text(json.dumps(self.state, indent=2), encoding="utf-8")
+        self._dirty = True
+        self._updates_since_save += 1
+        if self._updates_since_save >= self.save_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write the state to disk, if anything changed since the last write.
+        """
+        if self._dirty:
+            json_io.dump_path(self.path, self.state)
+            self._dirty = False
+            self._updates_since_save = 0
 
     def _embedding_score(self, node_id: str) -> float:
+        gen = self.neuron_graph.generation
+        if gen != self._embed_gen:
+            self._embed_cache.clear()
+            self._embed_gen = gen
+        cached = self._embed_cache.get(node_id)
+        if cached is None:
+            cached = self._embed_cache[node_id] = self._compute_embedding_score(node_id)
+        return cached
+
+    def _compute_embedding_score(self, node_id: str) -> float:
         node = self.neuron_graph.nodes.get(node_id)
         if not node:
             return 0.0
         embedding = node.get("embedding") or []
         if not embedding:
             return 0.0
-        base = sum(float(v) for v in embedding)
+        if np is not None and len(embedding) >= _NP_MIN_DIM:
+            base = float(np.asarray(embedding, dtype=np.float64).sum())
+        else:
+            base = sum(float(v) for v in embedding)
         # incorporate neighbors to encourage associative reasoning
         neighbor_bonus = 0.0
         for n in self.neuron_graph.get_neighbors(node_id, top_k=5):
@@ -49,21 +107,22 @@ class ValueFunction:
         return (base / len(embedding)) * 0.1 + neighbor_bonus
 
     def _historical_score(self, candidate_id: str, candidate_type: str) -> float:
-        if candidate_type == "plugin":
-            stats = self.state.get("plugins", {}).get(candidate_id, {})
-        else:
-            stats = self.state.get("strategies", {}).get(candidate_id, {})
-        count = float(stats.get("count", 0.0))
-        reward_sum = float(stats.get("reward_sum", 0.0))
-        if count <= 0:
-            return 0.0
-        return reward_sum / max(count, 1.0)
+        key = ("plugins" if candidate_type == "plugin" else "strategies", candidate_id)
+        cached = self._hist_cache.get(key)
+        if cached is None:
+            stats = self.state.get(key[0], {}).get(candidate_id, {})
+            count = float(stats.get("count", 0.0))
+            reward_sum = float(stats.get("reward_sum", 0.0))
+            cached = 0.0 if count <= 0 else reward_sum / max(count, 1.0)
+            self._hist_cache[key] = cached
+        return cached
 
     def update_plugin(self, plugin_id: str, reward: float) -> None:
         stats = self.state.setdefault("plugins", {}).setdefault(plugin_id, {"count": 0.0, "reward_sum": 0.0})
         stats["count"] = stats.get("count", 0.0) + 1.0
         stats["reward_sum"] = stats.get("reward_sum", 0.0) + float(reward)
         self.state["plugins"][plugin_id] = stats
+        self._hist_cache.pop(("plugins", plugin_id), None)
         self._save()
 
     def update_strategy(self, strategy: str, reward: float) -> None:
@@ -71,6 +130,7 @@ class ValueFunction:
         stats["count"] = stats.get("count", 0.0) + 1.0
         stats["reward_sum"] = stats.get("reward_sum", 0.0) + float(reward)
         self.state["strategies"][strategy] = stats
+        self._hist_cache.pop(("strategies", strategy), None)
         self._save()
 
     def update_concept(self, concept_id: str, reward: float) -> None:
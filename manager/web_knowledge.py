@@ -1,12 +1,26 @@
 from __future__ import annotations
 
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:  # pragma: no cover - optional dependency
+    HTMLParser = None  # type: ignore[assignment,misc]
+
 from bs4 import BeautifulSoup
 
+_SKIP_TAGS = ["script", "style", "noscript"]
+
 
 def extract_plain_text(html: str, max_chars: int = 4000) -> str:
-    soup = BeautifulSoup(html, "html.parser")
-    for tag in soup(["script", "style", "noscript"]):
-        tag.decompose()
-    text = soup.get_text(separator=" ")
+    if HTMLParser is not None:
+        # C parser, much faster than BeautifulSoup on full documentation pages
+        tree = HTMLParser(html)
+        tree.strip_tags(_SKIP_TAGS)
+        root = tree.root
+        text = root.text(separator=" ") if root is not None else ""
+    else:
+        soup = BeautifulSoup(html, "html.parser")
+        for tag in soup(_SKIP_TAGS):
+            tag.decompose()
+        text = soup.get_text(separator=" ")
     text = " ".join(text.split())
     return text[:max_chars]
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
 from urllib.parse import urlparse
 
 import requests
+from requests.adapters import HTTPAdapter
 
 ALLOWED_DOMAINS = {
     "docs.python.org",
@@ -11,31 +14,103 @@ ALLOWED_DOMAINS = {
     "developer.mozilla.org",
 }
 
+# Fast path for the domain gate; anything else goes through urlparse.
+_ALLOWED_PREFIXES = tuple(f"{scheme}://{d}/" for d in sorted(ALLOWED_DOMAINS) for scheme in ("https", "http"))
+
+# Callers keep only the first few KB of extracted text, so stop reading a page here.
+MAX_FETCH_BYTES = 256 * 1024
+# Pages remembered with their ETag/Last-Modified for conditional re-fetches.
+VALIDATOR_CACHE_SIZE = 64
+
 
 class WebSensor:
     """
     Controlled HTTP client:
       - domain whitelist
-      - simple rate limiting
+      - token-bucket rate limiting: one request per rate_limit seconds on
+        average, with bursts of up to `burst` back-to-back requests
       - short timeout
     """
 
-    def __init__(self, timeout: float = 5.0, rate_limit: float = 1.0) -> None:
+    def __init__(self, timeout: float = 5.0, rate_limit: float = 1.0, burst: int = 3) -> None:
         self.timeout = timeout
         self.rate_limit = rate_limit
-        self._last_call = 0.0
-
-    def fetch_text(self, url: str) -> str:
-        domain = urlparse(url).netloc
-        if domain not in ALLOWED_DOMAINS:
-            raise ValueError(f"Domain not allowed: {domain}")
-
-        now = time.time()
-        elapsed = now - self._last_call
-        if elapsed < self.rate_limit:
-            time.sleep(self.rate_limit - elapsed)
-
-        resp = requests.get(url, timeout=self.timeout)
-        resp.raise_for_status()
-        self._last_call = time.time()
-        return resp.text
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        # pooled keep-alive connections: repeat fetches from the same docs host skip the TLS handshake
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        # (url, max_bytes) -> (etag, last_modified, text)
+        self._validators: "OrderedDict[Tuple[str, int], Tuple[Optional[str], Optional[str], str]]" = OrderedDict()
+
+    def close(self) -> None:
+        self._session.close()
+
+    def __enter__(self) -> "WebSensor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _take_token(self) -> None:
+        if self.rate_limit <= 0:
+            return
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) / self.rate_limit)
+        self._last_refill = now
+        if self._tokens < 1.0:
+            wait = (1.0 - self._tokens) * self.rate_limit
+            time.sleep(wait)
+            self._tokens = 1.0
+            self._last_refill = now + wait
+        self._tokens -= 1.0
+
+    def fetch_text(self, url: str, max_bytes: int = MAX_FETCH_BYTES) -> str:
+        if not url.startswith(_ALLOWED_PREFIXES):
+            domain = urlparse(url).netloc
+            if domain not in ALLOWED_DOMAINS:
+                raise ValueError(f"Domain not allowed: {domain}")
+
+        self._take_token()
+
+        key = (url, max_bytes)
+        cached = self._validators.get(key)
+        headers: Dict[str, str] = {}
+        if cached is not None:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        with self._session.get(url, timeout=self.timeout, stream=True, headers=headers) as resp:
+            if resp.status_code == 304 and cached is not None:
+                self._validators.move_to_end(key)
+                return cached[2]
+            resp.raise_for_status()
+            buf = bytearray()
+            for chunk in resp.iter_content(chunk_size=16384):
+                buf += chunk
+                if len(buf) >= max_bytes:
+                    del buf[max_bytes:]
+                    break
+            # apparent_encoding would read the whole body, which is what we avoid here
+            encoding = resp.encoding or "utf-8"
+            etag = resp.headers.get("ETag")
+            last_modified = resp.headers.get("Last-Modified")
+        # the cut may split a multi-byte character
+        try:
+            text = buf.decode(encoding, errors="replace")
+        except LookupError:
+            text = buf.decode("utf-8", errors="replace")
+        if etag or last_modified:
+            self._validators[key] = (etag, last_modified, text)
+            self._validators.move_to_end(key)
+            if len(self._validators) > VALIDATOR_CACHE_SIZE:
+                self._validators.popitem(last=False)
+        else:
+            self._validators.pop(key, None)
+        return text
@@ -16,27 +16,60 @@ Command-line neural network builder with chaining and text-to-neuron graph mode.
 from __future__ import annotations
 
 import argparse
+import csv
+import io
+import math
+import os
 import re
 import sqlite3
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from itertools import islice, repeat
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional
 
 import numpy as np
 
+try:
+    import numexpr as ne
+except ImportError:  # pragma: no cover - optional dependency
+    ne = None
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:  # pragma: no cover - optional dependency
+    threadpool_limits = None
+
+# numexpr's thread start-up only pays off on larger arrays.
+_NE_MIN_SIZE = 1 << 14
+# Below this layer width a multi-threaded BLAS spends more time waking threads than multiplying.
+_BLAS_SINGLE_THREAD_WIDTH = 256
+_BLAS_THREAD_ENV = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
 
 # ----- Activation functions -------------------------------------------------
-def relu(x: np.ndarray) -> np.ndarray:
-    return np.maximum(0.0, x)
+# Forward activations take an optional `out` buffer so layers can reuse their
+# activation arrays between steps instead of allocating new ones.
+def relu(x: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+    return np.maximum(x, 0.0, out=out)
 
 
 def relu_grad(x: np.ndarray) -> np.ndarray:
     return (x > 0).astype(x.dtype)
 
 
-def sigmoid(x: np.ndarray) -> np.ndarray:
-    return 1.0 / (1.0 + np.exp(-x))
+def sigmoid(x: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+    if ne is not None and x.size >= _NE_MIN_SIZE:
+        # one fused pass instead of negate/exp/add/divide temporaries
+        return ne.evaluate("1 / (1 + exp(-x))", out=out, casting="same_kind")
+    if out is None:
+        return 1.0 / (1.0 + np.exp(-x))
+    np.negative(x, out=out)
+    np.exp(out, out=out)
+    out += 1.0
+    return np.reciprocal(out, out=out)
 
 
 def sigmoid_grad(x: np.ndarray) -> np.ndarray:
@@ -44,8 +77,8 @@ def sigmoid_grad(x: np.ndarray) -> np.ndarray:
     return s * (1.0 - s)
 
 
-def tanh(x: np.ndarray) -> np.ndarray:
-    return np.tanh(x)
+def tanh(x: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+    return np.tanh(x, out=out)
 
 
 def tanh_grad(x: np.ndarray) -> np.ndarray:
@@ -53,7 +86,7 @@ def tanh_grad(x: np.ndarray) -> np.ndarray:
     return 1.0 - t * t
 
 
-def linear(x: np.ndarray) -> np.ndarray:
+def linear(x: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
     return x
 
 
@@ -69,39 +102,143 @@ ACTIVATIONS = {
 }
 
 
+# Backward passes that fold the activation derivative into the multiply with the
+# incoming gradient, reusing the saved pre-activation z / activation a instead of
+# recomputing the activation.
+def _relu_backward(grad_out: np.ndarray, z: np.ndarray, a: np.ndarray, out: np.ndarray) -> np.ndarray:
+    return np.multiply(grad_out, z > 0, out=out)
+
+
+def _sigmoid_backward(grad_out: np.ndarray, z: np.ndarray, a: np.ndarray, out: np.ndarray) -> np.ndarray:
+    np.subtract(1.0, a, out=out)
+    out *= a
+    out *= grad_out
+    return out
+
+
+def _tanh_backward(grad_out: np.ndarray, z: np.ndarray, a: np.ndarray, out: np.ndarray) -> np.ndarray:
+    np.multiply(a, a, out=out)
+    np.subtract(1.0, out, out=out)
+    out *= grad_out
+    return out
+
+
+_FUSED_BACKWARD = {
+    "relu": _relu_backward,
+    "sigmoid": _sigmoid_backward,
+    "tanh": _tanh_backward,
+}
+
+
+def mse_loss_and_grad(preds: np.ndarray, y: np.ndarray) -> tuple[float, np.ndarray]:
+    """
+    Mean squared error and its gradient w.r.t. preds (averaged over rows).
+    """
+    if ne is not None and preds.size >= _NE_MIN_SIZE:
+        loss = float(ne.evaluate("sum((p - t) ** 2)", local_dict={"p": preds, "t": y})) / preds.size
+        scale = np.asarray(2.0 / y.shape[0], dtype=preds.dtype)
+        grad = ne.evaluate("scale * (p - t)", local_dict={"p": preds, "t": y, "scale": scale})
+        return loss, grad
+    # one difference array serves both: its dot with itself is the squared-error
+    # sum, then it is scaled in place into the gradient
+    diff = np.subtract(preds, y)
+    loss = float(np.vdot(diff, diff)) / diff.size
+    diff *= 2.0 / y.shape[0]
+    return loss, diff
+
+
 # ----- Core network pieces --------------------------------------------------
+def _rng_from_global_state() -> np.random.Generator:
+    # seeded from the legacy global state, so np.random.seed() still fixes weight init
+    return np.random.default_rng(np.random.randint(0, 2**32, size=4))
+
+
 @dataclass
 class DenseLayer:
     input_dim: int
     output_dim: int
     activation: str
+    # float32 halves memory traffic vs float64 and is plenty for these small nets.
+    dtype: type = np.float32
+    # weight-init generator; None draws one from np.random's global state
+    rng: Optional[np.random.Generator] = None
 
     def __post_init__(self) -> None:
         self.act_fn, self.act_grad = ACTIVATIONS[self.activation]
+        self._fused_backward = _FUSED_BACKWARD.get(self.activation)
+        # linear' == 1, so backward can use grad_out as-is
+        self._grad_is_identity = self.activation == "linear"
         # He initialization works well with ReLU; it is still stable for the rest.
-        self.W = np.random.randn(self.input_dim, self.output_dim) * np.sqrt(
-            2.0 / self.input_dim
-        )
-        self.b = np.zeros((1, self.output_dim))
+        # Drawn directly in the target dtype and scaled in place.
+        rng = self.rng if self.rng is not None else _rng_from_global_state()
+        dt = np.dtype(self.dtype)
+        shape = (self.input_dim, self.output_dim)
+        if dt in (np.float32, np.float64):
+            self.W = rng.standard_normal(shape, dtype=dt)
+        else:
+            self.W = rng.standard_normal(shape, dtype=np.float32).astype(dt)
+        self.W *= dt.type(math.sqrt(2.0 / self.input_dim))
+        self.b = np.zeros((1, self.output_dim), dtype=self.dtype)
         self._last_z: np.ndarray | None = None
+        self._last_a: np.ndarray | None = None
         self._last_x: np.ndarray | None = None
+        self._batch_rows = -1
+        self._buf_rows = 0
+
+    def _ensure_buffers(self, rows: int) -> None:
+        # Per-step arrays are allocated for the largest batch seen and then reused;
+        # smaller batches (e.g. a ragged final mini-batch) get leading-row views.
+        if rows == self._batch_rows:
+            return
+        if rows > self._buf_rows:
+            dt = self.W.dtype
+            self._z_buf = np.empty((rows, self.output_dim), dtype=dt)
+            self._a_buf = np.empty((rows, self.output_dim), dtype=dt)
+            self._ga_buf = np.empty((rows, self.output_dim), dtype=dt)
+            self._gin_buf = np.empty((rows, self.input_dim), dtype=dt)
+            self._gw = np.empty((self.input_dim, self.output_dim), dtype=dt)
+            self._gb = np.empty((1, self.output_dim), dtype=dt)
+            self._buf_rows = rows
+        self._z = self._z_buf[:rows]
+        self._a = self._a_buf[:rows]
+        self._ga = self._ga_buf[:rows]
+        self._gin = self._gin_buf[:rows]
+        self._batch_rows = rows
 
     def forward(self, x: np.ndarray) -> np.ndarray:
+        """
+        Returns a buffer owned by the layer; it is overwritten by the next forward call.
+        """
+        self._ensure_buffers(x.shape[0])
         self._last_x = x
-        z = x @ self.W + self.b
+        z = np.matmul(x, self.W, out=self._z)
+        z += self.b
         self._last_z = z
-        return self.act_fn(z)
+        self._last_a = self.act_fn(z, out=self._a)
+        return self._last_a
 
     def backward(self, grad_out: np.ndarray, lr: float) -> np.ndarray:
+        """
+        Returns a buffer owned by the layer; it is overwritten by the next backward call.
+        """
         if self._last_x is None or self._last_z is None:
             raise RuntimeError("Call forward before backward.")
-        grad_activation = grad_out * self.act_grad(self._last_z)
-        grad_w = self._last_x.T @ grad_activation / self._last_x.shape[0]
-        grad_b = grad_activation.mean(axis=0, keepdims=True)
-        grad_input = grad_activation @ self.W.T
-
-        self.W -= lr * grad_w
-        self.b -= lr * grad_b
+        x = self._last_x
+        if self._grad_is_identity:
+            grad_activation = grad_out
+        elif self._fused_backward is not None:
+            grad_activation = self._fused_backward(grad_out, self._last_z, self._last_a, self._ga)
+        else:
+            grad_activation = np.multiply(grad_out, self.act_grad(self._last_z), out=self._ga)
+        grad_w = np.matmul(x.T, grad_activation, out=self._gw)
+        grad_w /= x.shape[0]
+        grad_b = np.mean(grad_activation, axis=0, keepdims=True, out=self._gb)
+        grad_input = np.matmul(grad_activation, self.W.T, out=self._gin)
+
+        grad_w *= lr
+        self.W -= grad_w
+        grad_b *= lr
+        self.b -= grad_b
         return grad_input
 
     def summary_row(self) -> str:
@@ -111,17 +248,31 @@ class DenseLayer:
 
 class NeuralNetwork:
     def __init__(
-        self, input_dim: int, hidden_layers: List[int], output_dim: int, activation: str
+        self,
+        input_dim: int,
+        hidden_layers: List[int],
+        output_dim: int,
+        activation: str,
+        dtype: type = np.float32,
+        rng: Optional[np.random.Generator] = None,
     ) -> None:
         self.input_dim = input_dim
         self.output_dim = output_dim
+        self.dtype = dtype
+        if rng is None:
+            rng = _rng_from_global_state()
         sizes = [input_dim] + hidden_layers + [output_dim]
         self.layers = [
-            DenseLayer(sizes[i], sizes[i + 1], activation=activation)
+            DenseLayer(sizes[i], sizes[i + 1], activation=activation, dtype=dtype, rng=rng)
             for i in range(len(sizes) - 1)
         ]
 
     def forward(self, x: np.ndarray) -> np.ndarray:
+        return self._forward(x).copy()
+
+    def _forward(self, x: np.ndarray) -> np.ndarray:
+        # returns the last layer's buffer; only train_step and the chain use it directly
+        x = np.ascontiguousarray(x, dtype=self.dtype)
         for layer in self.layers:
             x = layer.forward(x)
         return x
@@ -133,11 +284,11 @@ class NeuralNetwork:
 
     def train_step(self, x: np.ndarray, y: np.ndarray, lr: float) -> float:
         # Mean squared error loss to keep things simple.
-        preds = self.forward(x)
-        loss = np.mean((preds - y) ** 2)
-        grad = 2.0 * (preds - y) / y.shape[0]
+        preds = self._forward(x)
+        y = np.ascontiguousarray(y, dtype=self.dtype)
+        loss, grad = mse_loss_and_grad(preds, y)
         self.backward(grad, lr)
-        return float(loss)
+        return loss
 
     def summary(self) -> str:
         lines = ["Neural network layout:"]
@@ -165,17 +316,20 @@ class NetworkChain:
                 )
 
     def forward(self, x: np.ndarray) -> np.ndarray:
+        return self._forward(x).copy()
+
+    def _forward(self, x: np.ndarray) -> np.ndarray:
         for net in self.networks:
-            x = net.forward(x)
+            x = net._forward(x)
         return x
 
     def train_step(self, x: np.ndarray, y: np.ndarray, lr: float) -> float:
-        preds = self.forward(x)
-        loss = np.mean((preds - y) ** 2)
-        grad = 2.0 * (preds - y) / y.shape[0]
+        preds = self._forward(x)
+        y = np.ascontiguousarray(y, dtype=preds.dtype)
+        loss, grad = mse_loss_and_grad(preds, y)
         for net in reversed(self.networks):
             grad = net.backward(grad, lr)
-        return float(loss)
+        return loss
 
     def summary(self) -> str:
         lines = ["Neural network chain:"]
@@ -191,7 +345,8 @@ class NetworkChain:
 
 
 # ----- Text-to-neuron graph builder ----------------------------------------
-@dataclass
+# Value type only handed out by NeuronGraph.neurons; slots drop the per-instance __dict__.
+@dataclass(frozen=True, slots=True)
 class Neuron:
     id: int
     label: str
@@ -199,16 +354,51 @@ class Neuron:
 
 
 class GraphSink:
-    def add_neurons(self, records: list[tuple[int, str, str]]) -> None:  # pragma: no cover - interface
+    def add_neurons(self, records: Iterable[tuple[int, str, str]]) -> None:  # pragma: no cover - interface
         raise NotImplementedError
 
-    def add_edges(self, records: list[tuple[int, int, str]]) -> None:  # pragma: no cover - interface
+    def add_edges(self, records: Iterable[tuple[int, int, str]]) -> None:  # pragma: no cover - interface
         raise NotImplementedError
 
     def close(self) -> None:  # pragma: no cover - interface
         pass
 
 
+class _Column:
+    """
+    Append-only numpy column that grows by doubling.
+    """
+
+    def __init__(self, dtype: type) -> None:
+        self._data = np.empty(1024, dtype=dtype)
+        self._len = 0
+
+    def _reserve(self, extra: int) -> int:
+        end = self._len + extra
+        if end > self._data.size:
+            grown = np.empty(max(end, 2 * self._data.size), dtype=self._data.dtype)
+            grown[: self._len] = self._data[: self._len]
+            self._data = grown
+        return end
+
+    def extend(self, values: np.ndarray) -> None:
+        end = self._reserve(values.size)
+        self._data[self._len : end] = values
+        self._len = end
+
+    def fill(self, value: int, count: int) -> None:
+        end = self._reserve(count)
+        self._data[self._len : end] = value
+        self._len = end
+
+    def view(self) -> np.ndarray:
+        return self._data[: self._len]
+
+
+_EDGE_KINDS = ("sequence", "bridge")
+_SEQUENCE, _BRIDGE = 0, 1
+
+
 class NeuronGraph:
     def __init__(
         self,
@@ -219,8 +409,16 @@ class NeuronGraph:
     ) -> None:
         # None bridge_limit means unlimited
         self.bridge_limit = None if bridge_limit is None or bridge_limit < 0 else bridge_limit
-        self.neurons: list[Neuron] | None = [] if store_neurons else None
-        self.edges: list[tuple[int, int, str]] | None = [] if store_edges else None
+        # In-memory graph as parallel columns rather than one Python object per
+        # neuron/edge: labels plus an int32 index into _source_names per neuron,
+        # and int32 src/dst plus an int8 kind (index into _EDGE_KINDS) per edge.
+        self._labels: list[str] | None = [] if store_neurons else None
+        self._sources = _Column(np.int32) if store_neurons else None
+        self._source_names: list[str] = []
+        self._source_idx: dict[str, int] = {}
+        self._edge_src = _Column(np.int32) if store_edges else None
+        self._edge_dst = _Column(np.int32) if store_edges else None
+        self._edge_kind = _Column(np.int8) if store_edges else None
         self.sink = sink
         self._bridge_capped = False
         self.neuron_count = 0
@@ -228,59 +426,84 @@ class NeuronGraph:
         self.notes: list[str] = []
         self.per_source: dict[str, int] = {}
 
+    @property
+    def neurons(self) -> list[Neuron] | None:
+        """
+        Stored neurons as Neuron objects, built on demand from the columns.
+        """
+        if self._labels is None:
+            return None
+        names = self._source_names
+        return [
+            Neuron(i, label, names[s])
+            for i, (label, s) in enumerate(zip(self._labels, self._sources.view().tolist()))
+        ]
+
+    @property
+    def edges(self) -> list[tuple[int, int, str]] | None:
+        """
+        Stored edges as (src, dst, kind) tuples, built on demand from the columns.
+        """
+        if self._edge_src is None:
+            return None
+        kinds = [_EDGE_KINDS[k] for k in self._edge_kind.view().tolist()]
+        return list(zip(self._edge_src.view().tolist(), self._edge_dst.view().tolist(), kinds))
+
+    def _store_edges(self, src: np.ndarray, dst: np.ndarray, kind: int) -> None:
+        if self._edge_src is not None:
+            self._edge_src.extend(src)
+            self._edge_dst.extend(dst)
+            self._edge_kind.fill(kind, src.size)
+
     def add_tokens(self, tokens: list[str], source: str) -> None:
         if not tokens:
             return
         start = self.neuron_count
-        new_ids = list(range(start, start + len(tokens)))
-
-        if self.neurons is not None:
-            for tok in tokens:
-                self.neurons.append(Neuron(id=len(self.neurons), label=tok, source=source))
+        count = len(tokens)
+        new_ids = np.arange(start, start + count, dtype=np.int64)
+
+        if self._labels is not None:
+            src_idx = self._source_idx.get(source)
+            if src_idx is None:
+                src_idx = self._source_idx[source] = len(self._source_names)
+                self._source_names.append(source)
+            self._labels.extend(tokens)
+            self._sources.fill(src_idx, count)
         if self.sink:
-            self.sink.add_neurons([(nid, tok, source) for nid, tok in zip(new_ids, tokens)])
-        self.per_source[source] = self.per_source.get(source, 0) + len(tokens)
-        self.neuron_count += len(tokens)
+            self.sink.add_neurons(zip(range(start, start + count), tokens, repeat(source)))
+        self.per_source[source] = self.per_source.get(source, 0) + count
+        self.neuron_count += count
 
         # Connect tokens within the file in order.
-        seq_edges = [(a, b, "sequence") for a, b in zip(new_ids[:-1], new_ids[1:])]
-        if seq_edges:
-            if self.edges is not None:
-                self.edges.extend(seq_edges)
+        if count > 1:
+            self._store_edges(new_ids[:-1], new_ids[1:], _SEQUENCE)
             if self.sink:
-                self.sink.add_edges(seq_edges)
-            self.edge_count += len(seq_edges)
+                self.sink.add_edges(zip(range(start, start + count - 1), range(start + 1, start + count), repeat("sequence")))
+            self.edge_count += count - 1
 
         # Connect all prior neurons to the new ones (bridge fan-in).
-        if start > 0 and new_ids:
-            prev_ids = list(range(start))
-            total_bridges = len(prev_ids) * len(new_ids)
-            bridge_edges: list[tuple[int, int, str]] = []
-            if self.bridge_limit is None or total_bridges <= self.bridge_limit:
-                for p in prev_ids:
-                    for n in new_ids:
-                        bridge_edges.append((p, n, "bridge"))
-            else:
+        if start > 0:
+            first = 0
+            if self.bridge_limit is not None and start * count > self.bridge_limit:
                 # Cap by only connecting the most recent chunk of previous neurons.
-                span = max(1, self.bridge_limit // max(1, len(new_ids)))
-                subset_prev = prev_ids[-span:]
-                for p in subset_prev:
-                    for n in new_ids:
-                        bridge_edges.append((p, n, "bridge"))
+                span = max(1, self.bridge_limit // max(1, count))
+                first = max(0, start - span)
                 self._bridge_capped = True
-            if bridge_edges:
-                if self.edges is not None:
-                    self.edges.extend(bridge_edges)
-                if self.sink:
-                    self.sink.add_edges(bridge_edges)
-                self.edge_count += len(bridge_edges)
+            # (p, n) for every previous p and new n, in the same p-major order as a
+            # nested loop, but built by numpy instead of one tuple per interpreter step.
+            src = np.repeat(np.arange(first, start, dtype=np.int64), count)
+            dst = np.tile(new_ids, start - first)
+            self._store_edges(src, dst, _BRIDGE)
+            if self.sink:
+                self.sink.add_edges(zip(src.tolist(), dst.tolist(), repeat("bridge")))
+            self.edge_count += src.size
 
     def summary(self) -> str:
         per_source = self.per_source
         lines = [
             "Neuron graph summary:",
             f"- Total neurons: {self.neuron_count}",
-            f"- Total edges:   {self.edge_count if self.edge_count else len(self.edges or [])}",
+            f"- Total edges:   {self.edge_count}",
         ]
         for src, count in per_source.items():
             lines.append(f"- {src}: {count} neurons")
@@ -316,9 +539,21 @@ def prompt_yes_no(prompt: str, default: bool = False) -> bool:
     return raw in {"y", "yes"}
 
 
-def tokenize_text(text: str) -> list[str]:
+_TOKEN_RE = re.compile(r"[A-Za-z0-9']+")
+# The bytes _TOKEN_RE matches, for finding a token-free cut point in raw file data.
+_TOKEN_BYTES = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'"
+_READ_CHUNK = 1 << 20
+
+
+def tokenize_text(text: str | bytes) -> list[str]:
     # Simple word-level tokenizer; keeps alphanumeric and apostrophes.
-    return re.findall(r"[A-Za-z0-9']+", text.lower())
+    if isinstance(text, (bytes, bytearray)):
+        # Raw file bytes skip the UTF-8 decode: bytes.lower() only folds ASCII, and
+        # latin-1 maps each byte to one char, so multi-byte sequences never match.
+        text = text.lower().decode("latin-1")
+    else:
+        text = text.lower()
+    return _TOKEN_RE.findall(text)
 
 
 class PostgresSink(GraphSink):
@@ -367,39 +602,52 @@ class PostgresSink(GraphSink):
             )
             """
         )
+        # edge indexes are built once in close(), after the bulk load
+        self.conn.commit()
+
+    def _create_indexes(self) -> None:
         self._execute(
             f'CREATE INDEX IF NOT EXISTS edges_src_idx ON "{self.schema}".edges(src)'
         )
         self._execute(
             f'CREATE INDEX IF NOT EXISTS edges_dst_idx ON "{self.schema}".edges(dst)'
         )
-        self.conn.commit()
+        self._execute(
+            f'CREATE INDEX IF NOT EXISTS neurons_label_idx ON "{self.schema}".neurons(label)'
+        )
+
+    def _copy_rows(self, table: str, columns: str, rows: list[tuple]) -> None:
+        # COPY streams the whole batch in one statement instead of one INSERT per row.
+        sql = f'COPY "{self.schema}".{table} ({columns}) FROM STDIN'
+        if self._db == "psycopg":
+            with self.cur.copy(sql) as copy:
+                for row in rows:
+                    copy.write_row(row)
+        else:
+            buf = io.StringIO()
+            csv.writer(buf, lineterminator="\n").writerows(rows)
+            buf.seek(0)
+            self.cur.copy_expert(f"{sql} WITH (FORMAT csv)", buf)
 
     def _flush_neurons(self) -> None:
         if not self._neurons_buffer:
             return
-        self.cur.executemany(
-            f'INSERT INTO "{self.schema}".neurons (id, label, source) VALUES (%s, %s, %s)',
-            self._neurons_buffer,
-        )
+        self._copy_rows("neurons", "id, label, source", self._neurons_buffer)
         self._neurons_buffer.clear()
 
     def _flush_edges(self) -> None:
         if not self._edges_buffer:
             return
-        self.cur.executemany(
-            f'INSERT INTO "{self.schema}".edges (src, dst, kind) VALUES (%s, %s, %s)',
-            self._edges_buffer,
-        )
+        self._copy_rows("edges", "src, dst, kind", self._edges_buffer)
         self._edges_buffer.clear()
 
-    def add_neurons(self, records: list[tuple[int, str, str]]) -> None:
+    def add_neurons(self, records: Iterable[tuple[int, str, str]]) -> None:
         self._neurons_buffer.extend(records)
         if len(self._neurons_buffer) >= self.batch_size:
             self._flush_neurons()
             self.conn.commit()
 
-    def add_edges(self, records: list[tuple[int, int, str]]) -> None:
+    def add_edges(self, records: Iterable[tuple[int, int, str]]) -> None:
         self._edges_buffer.extend(records)
         if len(self._edges_buffer) >= self.batch_size:
             self._flush_edges()
@@ -408,20 +656,29 @@ class PostgresSink(GraphSink):
     def close(self) -> None:
         self._flush_neurons()
         self._flush_edges()
+        self._create_indexes()
         self.conn.commit()
         self.cur.close()
         self.conn.close()
 
 
 class SQLiteSink(GraphSink):
-    def __init__(self, path: str, batch_size: int = 5000) -> None:
+    def __init__(self, path: str, batch_size: int = 5000, commit_every: int = 100_000) -> None:
         self.path = path
         self.batch_size = batch_size
+        # Rows are written every batch_size but committed (and synced) only every
+        # commit_every rows; each commit is an fsync, so per-batch commits stall bulk loads.
+        self.commit_every = commit_every
+        self._uncommitted = 0
         try:
             self.conn = sqlite3.connect(self.path)
         except Exception as exc:  # pragma: no cover - connectivity/environment
             raise SystemExit(f"Failed to open SQLite database: {exc}")
         self.cur = self.conn.cursor()
+        self.cur.execute("PRAGMA journal_mode=WAL")
+        self.cur.execute("PRAGMA synchronous=NORMAL")
+        self.cur.execute("PRAGMA temp_store=MEMORY")
+        self.cur.execute("PRAGMA cache_size=-200000")
         self._setup_schema()
         self._neurons_buffer: list[tuple[int, str, str]] = []
         self._edges_buffer: list[tuple[int, int, str]] = []
@@ -445,9 +702,21 @@ class SQLiteSink(GraphSink):
             )
             """
         )
+        # edge indexes are built once in close(), after the bulk load
+        self.conn.commit()
+
+    def _create_indexes(self) -> None:
         self.cur.execute("CREATE INDEX IF NOT EXISTS edges_src_idx ON edges(src)")
         self.cur.execute("CREATE INDEX IF NOT EXISTS edges_dst_idx ON edges(dst)")
-        self.conn.commit()
+        # query.py looks neurons up by exact label
+        self.cur.execute("CREATE INDEX IF NOT EXISTS neurons_label_idx ON neurons(label)")
+        # statistics for the planner, gathered once per build instead of per query
+        self.cur.execute("ANALYZE")
+
+    def _maybe_commit(self) -> None:
+        if self._uncommitted >= self.commit_every:
+            self.conn.commit()
+            self._uncommitted = 0
 
     def _flush_neurons(self) -> None:
         if not self._neurons_buffer:
@@ -456,6 +725,7 @@ class SQLiteSink(GraphSink):
             "INSERT OR REPLACE INTO neurons (id, label, source) VALUES (?, ?, ?)",
             self._neurons_buffer,
         )
+        self._uncommitted += len(self._neurons_buffer)
         self._neurons_buffer.clear()
 
     def _flush_edges(self) -> None:
@@ -465,23 +735,25 @@ class SQLiteSink(GraphSink):
             "INSERT INTO edges (src, dst, kind) VALUES (?, ?, ?)",
             self._edges_buffer,
         )
+        self._uncommitted += len(self._edges_buffer)
         self._edges_buffer.clear()
 
-    def add_neurons(self, records: list[tuple[int, str, str]]) -> None:
+    def add_neurons(self, records: Iterable[tuple[int, str, str]]) -> None:
         self._neurons_buffer.extend(records)
         if len(self._neurons_buffer) >= self.batch_size:
             self._flush_neurons()
-            self.conn.commit()
+            self._maybe_commit()
 
-    def add_edges(self, records: list[tuple[int, int, str]]) -> None:
+    def add_edges(self, records: Iterable[tuple[int, int, str]]) -> None:
         self._edges_buffer.extend(records)
         if len(self._edges_buffer) >= self.batch_size:
             self._flush_edges()
-            self.conn.commit()
+            self._maybe_commit()
 
     def close(self) -> None:
         self._flush_neurons()
         self._flush_edges()
+        self._create_indexes()
         self.conn.commit()
         self.cur.close()
         self.conn.close()
@@ -522,12 +794,72 @@ def collect_text_files(args: argparse.Namespace) -> list[Path]:
     return files
 
 
+def _read_file_tokens(path: Path, per_file_cap: int | None) -> tuple[list[str], bool] | OSError | None:
+    """
+    Tokenize one file: (tokens capped at per_file_cap, whether the cap cut it), None
+    if the file is missing, or the OSError raised while reading it. Runs in worker processes.
+    """
+    if not path.exists():
+        return None
+    # Read in chunks cut after the last non-token byte, so no token straddles two
+    # chunks, and stop one token past the cap: a huge file costs a few chunks, not
+    # a full read plus a lowered copy of it.
+    tokens: list[str] = []
+    try:
+        with path.open("rb") as f:
+            tail = b""
+            while per_file_cap is None or len(tokens) <= per_file_cap:
+                chunk = f.read(_READ_CHUNK)
+                if not chunk:
+                    tokens.extend(tokenize_text(tail))
+                    break
+                buf = tail + chunk if tail else chunk
+                cut = len(buf.rstrip(_TOKEN_BYTES))
+                tokens.extend(tokenize_text(buf[:cut]))
+                tail = buf[cut:]
+    except OSError as exc:
+        return exc
+    truncated = per_file_cap is not None and len(tokens) > per_file_cap
+    if truncated:
+        del tokens[per_file_cap:]
+    return tokens, truncated
+
+
+def _iter_file_tokens(
+    files: list[Path], per_file_cap: int | None, workers: int
+) -> Iterator[tuple[Path, tuple[list[str], bool] | OSError | None]]:
+    """
+    Yield (path, _read_file_tokens result) in file order. With several workers the
+    files are tokenized in a process pool, a bounded number of files ahead of the
+    consumer so stopping early (e.g. at --max-neurons) does not read the rest.
+    """
+    if workers <= 1 or len(files) < 2:
+        for path in files:
+            yield path, _read_file_tokens(path, per_file_cap)
+        return
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        pending: deque = deque()
+        remaining = iter(files)
+        for path in islice(remaining, 2 * workers):
+            pending.append((path, pool.submit(_read_file_tokens, path, per_file_cap)))
+        while pending:
+            path, future = pending.popleft()
+            nxt = next(remaining, None)
+            if nxt is not None:
+                pending.append((nxt, pool.submit(_read_file_tokens, nxt, per_file_cap)))
+            yield path, future.result()
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
 def build_graph_from_files(
     files: list[Path],
     bridge_limit: int,
     max_tokens_per_file: int,
     max_neurons: int,
     sink: GraphSink | None = None,
+    workers: int = 1,
 ) -> NeuronGraph:
     graph = NeuronGraph(
         bridge_limit=bridge_limit,
@@ -538,36 +870,43 @@ def build_graph_from_files(
     total_neurons = 0
     per_file_cap = None if max_tokens_per_file < 0 else max_tokens_per_file
     global_cap = None if max_neurons < 0 else max_neurons
-
-    for path in files:
-        if global_cap is not None and total_neurons >= global_cap:
-            graph.notes.append(
-                f"Stopped ingesting because --max-neurons ({global_cap}) was reached."
-            )
-            break
-        if not path.exists():
-            print(f"Skipping missing file: {path}", file=sys.stderr)
-            continue
-        try:
-            text = path.read_text(encoding="utf-8", errors="ignore")
-        except OSError as exc:
-            print(f"Failed to read {path}: {exc}", file=sys.stderr)
-            continue
-        tokens = tokenize_text(text)
-        if per_file_cap is not None and len(tokens) > per_file_cap:
-            graph.notes.append(f"Truncated {path.name} to {per_file_cap} tokens.")
-            tokens = tokens[:per_file_cap]
-        if global_cap is not None and total_neurons + len(tokens) > global_cap:
-            remaining = max(0, global_cap - total_neurons)
-            tokens = tokens[:remaining]
-            graph.notes.append(
-                f"Truncated {path.name} to fit --max-neurons ({global_cap})."
-            )
-        if not tokens:
-            continue
-        graph.add_tokens(tokens, source=path.name)
-        total_neurons += len(tokens)
-        print(f"Added {len(tokens)} neurons from {path}")
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+
+    # Tokenizing is per-file and CPU-bound, so large corpora can opt into a process
+    # pool; adding tokens to the graph stays in this process and in file order.
+    # Token lists are pickled back to this process, so small runs stay serial.
+    stream = _iter_file_tokens(files, per_file_cap, workers)
+    try:
+        for path, result in stream:
+            if global_cap is not None and total_neurons >= global_cap:
+                graph.notes.append(
+                    f"Stopped ingesting because --max-neurons ({global_cap}) was reached."
+                )
+                break
+            if result is None:
+                print(f"Skipping missing file: {path}", file=sys.stderr)
+                continue
+            if isinstance(result, OSError):
+                print(f"Failed to read {path}: {result}", file=sys.stderr)
+                continue
+            tokens, truncated = result
+            if truncated:
+                graph.notes.append(f"Truncated {path.name} to {per_file_cap} tokens.")
+            count = len(tokens)
+            if global_cap is not None and total_neurons + count > global_cap:
+                count = max(0, global_cap - total_neurons)
+                del tokens[count:]
+                graph.notes.append(
+                    f"Truncated {path.name} to fit --max-neurons ({global_cap})."
+                )
+            if not count:
+                continue
+            graph.add_tokens(tokens, source=path.name)
+            total_neurons += count
+            print(f"Added {count} neurons from {path}")
+    finally:
+        stream.close()
     if sink:
         sink.close()
     return graph
@@ -661,6 +1000,27 @@ def parse_args(argv: list[str]) -> argparse.Namespace:
         default=0,
         help="Run a quick training demo on random data for this many epochs.",
     )
+    parser.add_argument(
+        "--demo-samples",
+        type=int,
+        default=256,
+        help="Number of random samples in the demo training set.",
+    )
+    parser.add_argument(
+        "--demo-batch-size",
+        type=int,
+        default=None,
+        help="Mini-batch size for demo training (default: the whole sample set per step).",
+    )
+    parser.add_argument(
+        "--blas-threads",
+        type=int,
+        default=None,
+        help=(
+            "BLAS threads for demo training (needs threadpoolctl). "
+            "Default: 1 for narrow networks, otherwise the BLAS default."
+        ),
+    )
     parser.add_argument(
         "--interactive",
         action="store_true",
@@ -722,21 +1082,71 @@ def parse_args(argv: list[str]) -> argparse.Namespace:
         "--sqlite-out",
         help="Path to a SQLite database file to stream neurons/edges without keeping them in RAM.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes used to tokenize text files in parallel (default: 1; 0 uses one per CPU).",
+    )
     return parser.parse_args(argv)
 
 
-def demo_training(chain: NetworkChain, epochs: int, lr: float) -> None:
+def _blas_threads_for(chain: NetworkChain, requested: int | None) -> int | None:
+    """
+    BLAS thread cap for training `chain`: the explicit request, else 1 for narrow
+    nets, else None (leave the BLAS default, including any *_NUM_THREADS env vars).
+    """
+    if requested is not None:
+        return max(1, requested)
+    if any(os.environ.get(name) for name in _BLAS_THREAD_ENV):
+        return None
+    widest = max(max(layer.input_dim, layer.output_dim) for net in chain.networks for layer in net.layers)
+    return 1 if widest < _BLAS_SINGLE_THREAD_WIDTH else None
+
+
+def demo_training(
+    chain: NetworkChain,
+    epochs: int,
+    lr: float,
+    blas_threads: int | None = None,
+    samples: int = 256,
+    batch_size: int | None = None,
+) -> None:
     if epochs <= 0:
         return
+    limit = _blas_threads_for(chain, blas_threads)
+    if limit is not None and threadpool_limits is not None:
+        with threadpool_limits(limits=limit, user_api="blas"):
+            _run_demo_training(chain, epochs, lr, samples, batch_size)
+    else:
+        _run_demo_training(chain, epochs, lr, samples, batch_size)
+
+
+def _run_demo_training(
+    chain: NetworkChain, epochs: int, lr: float, samples: int = 256, batch_size: int | None = None
+) -> None:
+    samples = max(1, samples)
+    batch = samples if batch_size is None or batch_size <= 0 else min(batch_size, samples)
     rng = np.random.default_rng(seed=42)
-    x = rng.normal(size=(256, chain.networks[0].input_dim))
-    target_w = rng.normal(
-        size=(chain.networks[0].input_dim, chain.networks[-1].output_dim)
+    x = rng.standard_normal((samples, chain.networks[0].input_dim), dtype=np.float32)
+    target_w = rng.standard_normal(
+        (chain.networks[0].input_dim, chain.networks[-1].output_dim), dtype=np.float32
     )
     y = np.maximum(0.0, x @ target_w)  # simple ReLU transform as fake ground truth
+    # Row slices of C-contiguous arrays stay contiguous, so every mini-batch is a plain GEMM.
+    x = np.ascontiguousarray(x)
+    y = np.ascontiguousarray(y)
 
     for epoch in range(1, epochs + 1):
-        loss = chain.train_step(x, y, lr)
+        if batch == samples:
+            loss = chain.train_step(x, y, lr)
+        else:
+            # sample-weighted mean of the per-batch losses
+            total = 0.0
+            for s in range(0, samples, batch):
+                xb = x[s : s + batch]
+                total += chain.train_step(xb, y[s : s + batch], lr) * xb.shape[0]
+            loss = total / samples
         if epoch % max(1, epochs // 5) == 0 or epoch == 1:
             print(f"[demo] epoch {epoch:3d}/{epochs} | loss={loss:.4f}")
 
@@ -762,6 +1172,7 @@ def run_text_mode(args: argparse.Namespace) -> None:
         max_tokens_per_file=args.max_tokens_per_file,
         max_neurons=args.max_neurons,
         sink=sink,
+        workers=args.workers,
     )
     print(graph.summary())
 
@@ -775,7 +1186,14 @@ def main(argv: list[str]) -> None:
     chain = NetworkChain(networks)
     print(chain.summary())
     if args.demo_epochs:
-        demo_training(chain, epochs=args.demo_epochs, lr=lr)
+        demo_training(
+            chain,
+            epochs=args.demo_epochs,
+            lr=lr,
+            blas_threads=args.blas_threads,
+            samples=args.demo_samples,
+            batch_size=args.demo_batch_size,
+        )
 
 
 if __name__ == "__main__":
@@ -1,3 +1,14 @@
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None  # type: ignore[assignment]
+
+
+def _is_array(values):
+    # ndarrays take the vectorized path; everything else stays on the C built-ins
+    return np is not None and isinstance(values, np.ndarray)
+
+
 def add_two_numbers(a, b):
     return a + b
 
@@ -7,14 +18,20 @@ def easy_pass():
 
 
 def list_sum(values):
+    if _is_array(values):
+        return values.sum().item()
     return sum(values) if values is not None else 0
 
 
 def list_min(values):
+    if _is_array(values):
+        return values.min().item() if values.size else None
     return min(values) if values else None
 
 
 def list_max(values):
+    if _is_array(values):
+        return values.max().item() if values.size else None
     return max(values) if values else None
 
 
@@ -25,6 +42,8 @@ def list_average(values):
 
 
 def filter_even(values):
+    if _is_array(values):
+        return values[values % 2 == 0]
     return [v for v in values if v % 2 == 0]
 
 
@@ -33,7 +52,8 @@ def abs_value(x):
 
 
 def set_union(a, b):
-    return set(a) | set(b)
+    # union() takes b as any iterable, so only one set is built
+    return set(a).union(b)
 
 
 def string_reverse(s):
@@ -41,6 +61,8 @@ def string_reverse(s):
 
 
 def map_square(values):
+    if _is_array(values):
+        return values * values
     return [v * v for v in values]
 
 
@@ -8,10 +8,11 @@ neurons and a small neighborhood of connected neurons to provide context.
 from __future__ import annotations
 
 import argparse
+import json
 import sqlite3
-from collections import defaultdict
+from collections import Counter
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Iterator
 
 
 def parse_args() -> argparse.Namespace:
@@ -32,6 +33,14 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Use SQL LIKE (%%term%%) instead of exact match on label.",
     )
+    parser.add_argument(
+        "--fts",
+        action="store_true",
+        help=(
+            "Serve --match-like from a trigram FTS5 index on labels instead of a full scan. "
+            "The index is built on first use and kept in sync by triggers."
+        ),
+    )
     parser.add_argument(
         "--limit",
         type=int,
@@ -44,85 +53,229 @@ def parse_args() -> argparse.Namespace:
         default=200,
         help="Max neighbor neurons to pull for the matched set.",
     )
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=1,
+        help="Follow outgoing edges this many hops from the matches (default: 1).",
+    )
     return parser.parse_args()
 
 
-def connect(db_path: Path) -> sqlite3.Connection:
+# Connection-local read tuning: a 128 MB page cache, up to 1 GB of the file memory-
+# mapped instead of read() into the cache, and temp b-trees (the CTE's UNION) in RAM.
+_PRAGMAS = (
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-131072",
+    "PRAGMA mmap_size=1073741824",
+)
+
+
+# Optional substring index for --match-like. The trigram tokenizer indexes every
+# 3-character window, so a MATCH on a term of 3+ characters is a case-insensitive
+# substring search, like LIKE '%term%'. The table is external-content: it stores
+# only the index and reads labels from neurons. The triggers keep it in sync. The
+# BEFORE INSERT one also covers the INSERT OR REPLACE writes from nn_builder's
+# SQLiteSink, which do not fire delete triggers.
+_FTS_SETUP = (
+    "CREATE VIRTUAL TABLE neurons_fts USING fts5("
+    "label, content='neurons', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER neurons_fts_bi BEFORE INSERT ON neurons BEGIN "
+    "INSERT INTO neurons_fts(neurons_fts, rowid, label) "
+    "SELECT 'delete', id, label FROM neurons WHERE id = new.id; END",
+    "CREATE TRIGGER neurons_fts_ai AFTER INSERT ON neurons BEGIN "
+    "INSERT INTO neurons_fts(rowid, label) VALUES (new.id, new.label); END",
+    "CREATE TRIGGER neurons_fts_ad AFTER DELETE ON neurons BEGIN "
+    "INSERT INTO neurons_fts(neurons_fts, rowid, label) VALUES ('delete', old.id, old.label); END",
+    "CREATE TRIGGER neurons_fts_au AFTER UPDATE ON neurons BEGIN "
+    "INSERT INTO neurons_fts(neurons_fts, rowid, label) VALUES ('delete', old.id, old.label); "
+    "INSERT INTO neurons_fts(rowid, label) VALUES (new.id, new.label); END",
+    "INSERT INTO neurons_fts(neurons_fts) VALUES ('rebuild')",
+)
+
+_FTS_LOOKUP_SQL = """
+    SELECT n.id, n.label, n.source
+    FROM neurons_fts
+    JOIN neurons n ON n.id = neurons_fts.rowid
+    WHERE neurons_fts MATCH ?
+    ORDER BY neurons_fts.rowid
+    LIMIT ?
+"""
+
+
+def connect(db_path: Path, fts: bool = False) -> sqlite3.Connection:
+    """
+    Open the DB read-only; only --fts, which may have to build its index, opens it for writing.
+    """
     if not db_path.exists():
         raise SystemExit(f"DB not found: {db_path}")
+    mode = "rw" if fts else "ro"
     try:
-        return sqlite3.connect(str(db_path))
+        conn = sqlite3.connect(f"{db_path.resolve().as_uri()}?mode={mode}", uri=True)
     except Exception as exc:
         raise SystemExit(f"Failed to open DB: {exc}")
+    for pragma in _PRAGMAS:
+        conn.execute(pragma)
+    if fts:
+        ensure_label_fts(conn)
+    return conn
+
+
+def ensure_label_fts(conn: sqlite3.Connection) -> bool:
+    """
+    Create and fill neurons_fts if it is missing. False if it is unavailable
+    (SQLite without FTS5/trigram, or a read-only DB).
+    """
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'neurons_fts'").fetchone():
+        return True
+    try:
+        for sql in _FTS_SETUP:
+            conn.execute(sql)
+        conn.commit()
+    except sqlite3.OperationalError:
+        conn.rollback()
+        return False
+    return True
 
 
-def fetch_ids(cur: sqlite3.Cursor, term: str, like: bool, limit: int) -> list[int]:
+def fetch_ids(
+    cur: sqlite3.Cursor, term: str, like: bool, limit: int, fts: bool = False
+) -> list[tuple[int, str, str]]:
+    """
+    Matching neurons as (id, label, source) rows, so callers need no second lookup.
+    With fts, substring searches go through neurons_fts when the term allows it:
+    trigrams need 3+ characters, and % or _ only mean wildcards to LIKE.
+    """
+    if like and fts and len(term) >= 3 and "%" not in term and "_" not in term:
+        phrase = '"' + term.replace('"', '""') + '"'
+        try:
+            cur.execute(_FTS_LOOKUP_SQL, (phrase, limit))
+            return cur.fetchall()
+        except sqlite3.OperationalError:
+            pass  # no usable neurons_fts; fall back to the scan
     if like:
         cur.execute(
-            "SELECT id FROM neurons WHERE label LIKE ? LIMIT ?",
+            "SELECT id, label, source FROM neurons WHERE label LIKE ? LIMIT ?",
             (f"%{term}%", limit),
         )
     else:
-        cur.execute("SELECT id FROM neurons WHERE label = ? LIMIT ?", (term, limit))
-    return [row[0] for row in cur.fetchall()]
+        cur.execute("SELECT id, label, source FROM neurons WHERE label = ? LIMIT ?", (term, limit))
+    return cur.fetchall()
 
 
-def fetch_neighbors(
-    cur: sqlite3.Cursor, ids: Iterable[int], limit: int
-) -> list[tuple[int, str, str]]:
-    ids = list(ids)
-    if not ids:
-        return []
-    placeholders = ",".join("?" for _ in ids)
-    cur.execute(
-        f"""
-        SELECT n2.id, n2.label, n2.source
-        FROM edges e
-        JOIN neurons n2 ON n2.id = e.dst
-        WHERE e.src IN ({placeholders})
+# Source ids are bound as one JSON array and expanded by json_each, so the statement
+# text is the same for any number of ids and sqlite3 reuses its prepared statement.
+# CROSS JOIN pins the id list as the outer loop (SQLite never reorders it), making
+# each id one seek into edges.
+_ONE_HOP_SQL = """
+    SELECT n2.id, n2.label, n2.source
+    FROM json_each(?) s
+    CROSS JOIN edges e ON e.src = s.value
+    JOIN neurons n2 ON n2.id = e.dst
+    LIMIT ?
+"""
+
+# Breadth-first expansion kept inside SQLite: one statement for any depth instead of
+# a query per hop. UNION drops repeated (id, depth) pairs, which bounds each level;
+# a neuron reached at several depths is then reported once, at its nearest depth,
+# and seeds are never reported as their own neighbors. Rows come back nearest
+# first, then by id. Each id occurs at most once per level, so the CTE's LIMIT of
+# (seeds + limit) * (depth + 1) rows leaves room for `limit` distinct neighbors
+# while still stopping the walk early.
+_MULTI_HOP_SQL = """
+    WITH RECURSIVE frontier(id, depth) AS (
+        SELECT value, 0 FROM json_each(?)
+        UNION
+        SELECT e.dst, f.depth + 1
+        FROM frontier f
+        CROSS JOIN edges e ON e.src = f.id
+        WHERE f.depth < ?
         LIMIT ?
-        """,
-        (*ids, limit),
+    ),
+    reached(id, depth) AS (
+        SELECT id, MIN(depth)
+        FROM frontier
+        GROUP BY id
+        HAVING MIN(depth) > 0
     )
-    return cur.fetchall()
+    SELECT n.id, n.label, n.source
+    FROM reached r
+    JOIN neurons n ON n.id = r.id
+    ORDER BY r.depth, r.id
+    LIMIT ?
+"""
+
+
+def _neighbor_query(ids: Iterable[int], limit: int, depth: int) -> tuple[str, tuple] | None:
+    # distinct and ascending, as an IN (...) list would have visited them
+    ids = sorted(set(ids))
+    if not ids or depth < 1:
+        return None
+    ids_json = json.dumps(ids)
+    if depth == 1:
+        # one row per outgoing edge, as the tool has always reported
+        return _ONE_HOP_SQL, (ids_json, limit)
+    return _MULTI_HOP_SQL, (ids_json, depth, (len(ids) + limit) * (depth + 1), limit)
+
+
+def fetch_neighbors(
+    cur: sqlite3.Cursor, ids: Iterable[int], limit: int, depth: int = 1
+) -> Iterator[tuple[int, str, str]]:
+    """
+    Yield neighbor rows straight off the cursor, so large limits are never held as a list.
+    """
+    query = _neighbor_query(ids, limit, depth)
+    if query is None:
+        return
+    cur.execute(*query)
+    yield from cur
 
 
 def main() -> None:
     args = parse_args()
-    conn = connect(Path(args.db))
+    conn = connect(Path(args.db), fts=args.fts and args.match_like)
     cur = conn.cursor()
 
-    ids = fetch_ids(cur, args.term, args.match_like, args.limit)
-    if not ids:
+    matches = fetch_ids(cur, args.term, args.match_like, args.limit, fts=args.fts)
+    if not matches:
         print("No matching neurons.")
         return
-    print(f"Matched {len(ids)} neurons for term '{args.term}'.")
-
-    cur.execute(
-        f"SELECT id, label, source FROM neurons WHERE id IN ({','.join('?' for _ in ids)})",
-        ids,
-    )
-    matches = cur.fetchall()
-
-    neighbors = fetch_neighbors(cur, ids, args.neighbor_limit)
+    print(f"Matched {len(matches)} neurons for term '{args.term}'.")
+    ids = [row[0] for row in matches]
 
-    def summarize(records: list[tuple[int, str, str]], title: str, max_rows: int = 20) -> None:
-        print(f"\n{title} (showing up to {max_rows}):")
-        for rid, label, source in records[:max_rows]:
-            print(f"- id={rid} label={label} source={source}")
-        if len(records) > max_rows:
-            print(f"... {len(records) - max_rows} more")
+    def summarize(
+        records: list[tuple[int, str, str]], title: str, max_rows: int = 20, total: int | None = None
+    ) -> None:
+        total = len(records) if total is None else total
+        # built as one block so it goes out in a single write
+        lines = [f"\n{title} (showing up to {max_rows}):"]
+        lines.extend(f"- id={rid} label={label} source={source}" for rid, label, source in records[:max_rows])
+        if total > max_rows:
+            lines.append(f"... {total - max_rows} more")
+        print("\n".join(lines))
 
     summarize(matches, "Matches", max_rows=min(20, args.limit))
-    summarize(neighbors, "Neighbor neurons via outgoing edges", max_rows=min(20, args.neighbor_limit))
 
-    by_source = defaultdict(int)
-    for _, _, src in neighbors:
-        by_source[src] += 1
+    # One pass over the neighbor rows: the first max_rows are kept for printing and
+    # every row is tallied by source, so the (possibly recursive) query runs once.
+    max_rows = min(20, args.neighbor_limit)
+    shown: list[tuple[int, str, str]] = []
+    by_source: Counter[str] = Counter()
+    for row in fetch_neighbors(cur, ids, args.neighbor_limit, depth=args.depth):
+        if len(shown) < max_rows:
+            shown.append(row)
+        by_source[row[2]] += 1
+    summarize(
+        shown,
+        "Neighbor neurons via outgoing edges",
+        max_rows=max_rows,
+        total=sum(by_source.values()),
+    )
+
     if by_source:
+        # most_common keeps first-seen order among equal counts
         print("\nNeighbor counts by source (top 10):")
-        for src, count in sorted(by_source.items(), key=lambda kv: kv[1], reverse=True)[:10]:
-            print(f"- {src}: {count}")
+        print("\n".join(f"- {src}: {count}" for src, count in by_source.most_common(10)))
 
     conn.close()
 
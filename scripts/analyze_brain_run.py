@@ -1,8 +1,21 @@
 #!/usr/bin/env python3
 import json
+from array import array
 from pathlib import Path
 from collections import Counter, defaultdict
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+_loads = orjson.loads if orjson is not None else json.loads
+
 TRACE_PATH = Path("manager/traces/trace.jsonl")
 METRICS_PATH = Path("manager/metrics.json")
 
@@ -13,32 +26,63 @@ def load_metrics():
     return json.loads(METRICS_PATH.read_text())
 
 def load_traces(max_lines=None):
+    """
+    Yield parsed trace steps one at a time, so a large trace is never held in memory.
+    """
     if not TRACE_PATH.exists():
         print("trace.jsonl not found at", TRACE_PATH)
-        return []
-    traces = []
-    with TRACE_PATH.open() as f:
+        return
+    # Binary lines skip the str decode; both parsers take the UTF-8 bytes directly.
+    with TRACE_PATH.open("rb", buffering=1 << 20) as f:
         for i, line in enumerate(f):
             try:
-                traces.append(json.loads(line))
+                yield _loads(line)
             except Exception:
                 continue
             if max_lines is not None and i >= max_lines:
                 break
-    return traces
 
-def analyze_traces(traces, window=200):
-    if not traces:
-        print("No traces to analyze.")
-        return
+def _as_numpy(values):
+    # zero-copy view of an array("d")
+    return np.frombuffer(values, dtype=np.float64)
+
+def _worst_streak(step_rewards):
+    """
+    Longest run of non-positive step rewards, as a negative count (0 if there is none).
+    """
+    if np is not None and len(step_rewards):
+        bad = _as_numpy(step_rewards) <= 0
+        if not bad.any():
+            return 0
+        # running count of bad steps, minus its value at the latest good step = run length
+        run = np.cumsum(bad)
+        run -= np.maximum.accumulate(np.where(bad, 0, run))
+        return -int(run.max())
+    streak = 0
+    worst = 0
+    for r in step_rewards:
+        streak = streak - 1 if r <= 0 else 0
+        worst = min(worst, streak)
+    return worst
+
+def _sum(values):
+    return float(_as_numpy(values).sum()) if np is not None else sum(values)
 
+def analyze_traces(traces, window=200):
+    # traces may be a one-shot iterator (load_traces); it is walked exactly once
     # basic reward stats and domain mix
-    rewards = []
+    # flat doubles rather than one float object per list slot
+    rewards = array("d")
+    step_means = array("d")
     domains = Counter()
-    streak = 0
-    worst_streak = 0
+    # plugin/strategy frequency, gathered in the same pass over the trace
+    plugin_counter = Counter()
+    strategy_counter = Counter()
+    unsafe_counter = 0
 
+    total_steps = 0
     for step in traces:
+        total_steps += 1
         domain = step.get("domain", "unknown")
         domains[domain] += 1
         step_rewards = []
@@ -46,19 +90,25 @@ def analyze_traces(traces, window=200):
             r = action.get("reward", 0.0)
             rewards.append(r)
             step_rewards.append(r)
+            plugin = action.get("plugin")
+            strategy = action.get("pattern") or action.get("strategy")
+            if plugin:
+                plugin_counter[plugin] += 1
+            if strategy:
+                strategy_counter[strategy] += 1
+            if action.get("error_type") == "Unsafe" or action.get("result") == "unsafe":
+                unsafe_counter += 1
         # fallback if no actions recorded
         if not step_rewards:
             rewards.append(step.get("reward", 0.0))
-        step_reward = sum(step_rewards) / len(step_rewards) if step_rewards else step.get("reward", 0.0)
-        if step_reward <= 0:
-            streak -= 1
-        else:
-            streak = 0
-        worst_streak = min(worst_streak, streak)
-
-    avg_reward = sum(rewards) / len(rewards)
-    total_steps = len(traces)
-    total_reward = sum(rewards) if rewards else 0.0
+        step_means.append(sum(step_rewards) / len(step_rewards) if step_rewards else step.get("reward", 0.0))
+
+    if not total_steps:
+        print("No traces to analyze.")
+        return
+
+    worst_streak = _worst_streak(step_means)
+    total_reward = _sum(rewards) if rewards else 0.0
     avg_reward = (total_reward / len(rewards)) if rewards else 0.0
     print(f"Steps in trace: {total_steps}")
     print(f"Total reward: {total_reward:.3f}")
@@ -69,32 +119,15 @@ def analyze_traces(traces, window=200):
     # moving average of reward (last window steps)
     if len(rewards) >= window:
         recent = rewards[-window:]
-        recent_avg = sum(recent) / len(recent)
+        recent_avg = _sum(recent) / len(recent)
         print(f"Average reward over last {window} steps: {recent_avg:.3f}")
 
-    # plugin/strategy frequency from trace
-    plugin_counter = Counter()
-    strategy_counter = Counter()
-    unsafe_counter = 0
-
-    for step in traces:
-        for action in step.get("actions", []):
-            plugin = action.get("plugin")
-            strategy = action.get("pattern") or action.get("strategy")
-            if plugin:
-                plugin_counter[plugin] += 1
-            if strategy:
-                strategy_counter[strategy] += 1
-            if action.get("error_type") == "Unsafe" or action.get("result") == "unsafe":
-                unsafe_counter += 1
-
-    print("\nTop 10 plugins (from trace):")
-    for name, cnt in plugin_counter.most_common(10):
-        print(" ", name, "=>", cnt)
-
-    print("\nStrategies (from trace):")
-    for name, cnt in strategy_counter.most_common():
-        print(" ", name, "=>", cnt)
+    # each block is joined and written once rather than printed line by line
+    lines = ["\nTop 10 plugins (from trace):"]
+    lines.extend(f"  {name} => {cnt}" for name, cnt in plugin_counter.most_common(10))
+    lines.append("\nStrategies (from trace):")
+    lines.extend(f"  {name} => {cnt}" for name, cnt in strategy_counter.most_common())
+    print("\n".join(lines))
 
     print(f"\nApprox. Unsafe-related steps: {unsafe_counter}")
 
@@ -109,8 +142,7 @@ def main():
         print()
 
     print("=== TRACE ANALYSIS ===")
-    traces = load_traces()
-    analyze_traces(traces)
+    analyze_traces(load_traces())
 
 if __name__ == "__main__":
     main()
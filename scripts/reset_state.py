@@ -7,6 +7,8 @@ Backs up known JSON state files, then removes them so the next run starts fresh.
 
 from __future__ import annotations
 
+import errno
+import os
 import shutil
 from datetime import datetime
 from pathlib import Path
@@ -42,13 +44,20 @@ def reset_state() -> None:
     missing = []
 
     for path in STATE_PATHS:
-        if path.exists():
-            target = backup_dir / path.name
-            target.parent.mkdir(parents=True, exist_ok=True)
-            shutil.move(str(path), str(target))
-            moved.append(path.relative_to(REPO_ROOT))
-        else:
+        target = backup_dir / path.name
+        # one rename per file; a missing file surfaces as FileNotFoundError, so no
+        # separate exists() probe. Only a backups dir on another device needs
+        # shutil.move's copy; any other failure is a real error and is raised.
+        try:
+            os.replace(path, target)
+        except FileNotFoundError:
             missing.append(path.relative_to(REPO_ROOT))
+            continue
+        except OSError as exc:
+            if exc.errno != errno.EXDEV:
+                raise
+            shutil.move(str(path), str(target))
+        moved.append(path.relative_to(REPO_ROOT))
 
     print(f"Backed up state to {backup_dir.relative_to(REPO_ROOT)}")
     if moved:
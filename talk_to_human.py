@@ -1,9 +1,43 @@
 #!/usr/bin/env python3
+import os
 import sys
-import json
 from pathlib import Path
+from manager import json_io
 from manager.guidance import append_guidance
 
+_TAIL_CHUNK = 4096
+
+
+def _last_diary_entry(path: Path):
+    """
+    Last entry of the diary array. The mind writes one compact entry per line,
+    so only the end of the file is read; any other layout is parsed in full.
+    """
+    with path.open("rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        tail = b""
+        while pos > 0:
+            step = min(_TAIL_CHUNK, pos)
+            pos -= step
+            f.seek(pos)
+            tail = f.read(step) + tail
+            body = tail.rstrip()
+            if body.endswith(b"]"):
+                body = body[:-1].rstrip()
+            nl = body.rfind(b"\n")
+            if nl == -1 and pos > 0:
+                continue  # last entry is longer than what has been read so far
+            line = body[nl + 1:].rstrip(b",").lstrip(b"[")
+            try:
+                entry = json_io.loads(line)
+            except ValueError:
+                break
+            if isinstance(entry, dict):
+                return entry
+            break
+    data = json_io.load_path(path)
+    return data[-1] if isinstance(data, list) and data else None
+
 
 def main():
     if len(sys.argv) < 2:
@@ -15,9 +49,8 @@ def main():
     diary_path = Path("manager/mind_diary.json")
     if diary_path.exists():
         try:
-            data = json.loads(diary_path.read_text(encoding="utf-8"))
-            if isinstance(data, list) and data:
-                last = data[-1]
+            last = _last_diary_entry(diary_path)
+            if isinstance(last, dict):
                 reflection = last.get("reflection")
                 if reflection:
                     print("Latest reflection:", reflection)
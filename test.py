@@ -1,9 +1,13 @@
+import json
 import sqlite3
 
 DB_PATH = "/home/greendragon/Desktop/human/graph.db"  # adjust if you move it
 
 conn = sqlite3.connect(DB_PATH)
 cur = conn.cursor()
+cur.execute("PRAGMA temp_store=MEMORY")
+cur.execute("PRAGMA cache_size=-131072")
+cur.execute("PRAGMA mmap_size=1073741824")
 
 # Counts
 cur.execute("SELECT COUNT(*) FROM neurons"); print("neurons:", cur.fetchone()[0])
@@ -14,14 +18,13 @@ term = "socket"
 cur.execute("SELECT id FROM neurons WHERE label = ? LIMIT 200", (term,))
 ids = [row[0] for row in cur.fetchall()]
 if ids:
-    placeholders = ",".join("?" for _ in ids)
-    cur.execute(f"""
+    cur.execute("""
         SELECT n2.label, n2.source
-        FROM edges e
+        FROM json_each(?) s
+        CROSS JOIN edges e ON e.src = s.value AND e.kind='sequence'
         JOIN neurons n2 ON n2.id = e.dst
-        WHERE e.src IN ({placeholders}) AND e.kind='sequence'
         LIMIT 200
-    """, ids)
+    """, (json.dumps(ids),))
     print(cur.fetchall())
 
 conn.close()
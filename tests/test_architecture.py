@@ -1,9 +1,20 @@
 from __future__ import annotations
 
+import pytest
+
 import manager.metrics as metrics_module
 import manager.value_function as vf_module
 from manager.neuron_graph import NeuronGraph
-from manager.reward import compute_reward
+from manager.reward import PBRS_GAMMA, compute_reward, compute_reward_batch, task_potential
+
+
+@pytest.fixture(autouse=True)
+def _restore_state_paths(monkeypatch):
+    # Tests repoint these module-level state paths at tmp_path; registering them with
+    # monkeypatch restores the originals afterwards, so tests stay independent of
+    # order and of which xdist worker runs them.
+    monkeypatch.setattr(metrics_module, "METRICS_FILE", metrics_module.METRICS_FILE)
+    monkeypatch.setattr(vf_module, "VALUE_STATE_FILE", vf_module.VALUE_STATE_FILE)
 
 
 def test_neuron_graph_roundtrip(tmp_path):
@@ -22,6 +33,22 @@ def test_neuron_graph_roundtrip(tmp_path):
     assert neighbors[0]["weight"] >= 1.0
 
 
+def test_neuron_graph_topk_after_empty_query(tmp_path):
+    g = NeuronGraph(tmp_path / "graph.json")
+    assert g.topk_similar("missing") == []
+    g.add_node("a", "plugin", [1.0, 0.0, 0.0])
+    g.add_node("b", "plugin", [0.9, 0.1, 0.0])
+    g.add_node("c", "plugin", [0.0, 0.0, 1.0])
+    top = g.topk_similar("a", k=2)
+    assert [t["id"] for t in top] == ["b", "c"]
+
+    # reassigning the graph (as graph_client does) must not reuse the old matrix
+    g.graph = {"version": "0.1", "nodes": {}, "edges": []}
+    g.add_node("x", "plugin", [0.0, 1.0, 0.0])
+    g.add_node("y", "plugin", [0.0, 2.0, 0.0])
+    assert [t["id"] for t in g.topk_similar("x")] == ["y"]
+
+
 def test_value_function_scores_with_updates(tmp_path):
     vf_module.VALUE_STATE_FILE = tmp_path / "vf.json"
     g = NeuronGraph(tmp_path / "g.json")
@@ -32,6 +59,23 @@ def test_value_function_scores_with_updates(tmp_path):
     assert score > 0
 
 
+def test_value_function_exit_flush_is_weak(tmp_path):
+    import gc
+    import json
+
+    vf_module.VALUE_STATE_FILE = tmp_path / "vf.json"
+    g = NeuronGraph(tmp_path / "g.json")
+    vf = vf_module.ValueFunction(g, metrics=None, alpha=0.0)
+    vf.update_plugin("plugin:test", 1.0)
+    assert vf in vf_module._LIVE
+    vf_module._flush_live()
+    assert json.loads(vf.path.read_text())["plugins"]["plugin:test"]["count"] == 1.0
+    assert not vf.path.with_name(vf.path.name + ".tmp").exists()
+    del vf
+    gc.collect()
+    assert not any(v.path.parent == tmp_path for v in vf_module._LIVE)
+
+
 def test_reward_and_metrics(tmp_path):
     metrics_module.METRICS_FILE = tmp_path / "metrics.json"
     metrics = metrics_module.Metrics()
@@ -55,6 +99,31 @@ def test_reward_shaping_v2():
     assert negative < 0
 
 
+def test_reward_potential_shaping():
+    low, high = task_potential(-2.0, 1.0), task_potential(2.0, 0.0)
+    assert 0.0 < low < high < 1.0
+    outcome = {"tests_ok": True, "eval_ok": True, "tests_delta": 1, "prev_potential": low, "next_potential": high}
+    reward, details = compute_reward(outcome, return_details=True)
+    assert details["improvement_bonus"] == 0.0
+    assert details["potential_shaping"] == PBRS_GAMMA * high - low
+    worse, _ = compute_reward({**outcome, "prev_potential": high, "next_potential": low}, return_details=True)
+    assert worse < reward
+
+
+def test_reward_batch_matches_scalar():
+    outcomes = [
+        {"tests_ok": True, "eval_ok": True, "tests_delta": 1, "domain": "code"},
+        {"tests_ok": False, "eval_ok": False, "regressions": 2},
+        {"tests_ok": True, "result": "rejected", "progress": 0.1},
+        {"result": "unsafe"},
+        {"domain": "env", "env_reward": 0.7, "result": "accepted"},
+        {"reward": 10},
+        {"tests_ok": True, "tests_delta": 2, "prev_potential": 0.4, "next_potential": 0.6},
+    ]
+    batch = compute_reward_batch(outcomes)
+    assert [round(float(r), 9) for r in batch] == [round(compute_reward(o), 9) for o in outcomes]
+
+
 def test_explain_action(tmp_path):
     metrics_module.METRICS_FILE = tmp_path / "metrics.json"
     vf_module.VALUE_STATE_FILE = tmp_path / "vf.json"
@@ -82,36 +151,39 @@ def test_export_for_viz(tmp_path):
     assert subgraph["edges"]
 
 
-def test_multi_agent_smoke(monkeypatch, tmp_path):
+@pytest.fixture
+def mind_workspace(monkeypatch, tmp_path):
+    """
+    Empty repo layout in tmp_path as the cwd, with state files pointed into it.
+    Returns the Mind class; manager.mind is imported after the chdir so its
+    import-time graph load never reads the real repo state.
+    """
     monkeypatch.chdir(tmp_path)
+    for name in ("manager", "plugins", "tasks"):
+        (tmp_path / name).mkdir(parents=True, exist_ok=True)
+    metrics_module.METRICS_FILE = tmp_path / "manager" / "metrics.json"
+    vf_module.VALUE_STATE_FILE = tmp_path / "manager" / "vf.json"
+    from manager.mind import Mind
+
+    return Mind
+
+
+def test_multi_agent_smoke(monkeypatch, mind_workspace):
     monkeypatch.setenv("HUMAN_MULTI_AGENT", "1")
     monkeypatch.setenv("HUMAN_ENABLE_ENVS", "0")
     monkeypatch.setenv("USE_VALUE_FUNCTION", "0")
-    (tmp_path / "manager").mkdir(parents=True, exist_ok=True)
-    (tmp_path / "plugins").mkdir(parents=True, exist_ok=True)
-    (tmp_path / "tasks").mkdir(parents=True, exist_ok=True)
-    vf_module.VALUE_STATE_FILE = tmp_path / "vf.json"
-    metrics_module.METRICS_FILE = tmp_path / "metrics.json"
-    from manager.mind import Mind  # import after chdir to avoid touching repo files
 
-    mind = Mind()
+    mind = mind_workspace()
     monkeypatch.setattr(mind, "_act_and_learn", lambda active_task_names, forced_targets=None, strategy=None: None)
     mind._step_multi_agent([])
     assert hasattr(mind, "planner_agent")
 
 
-def test_async_step_runs(monkeypatch, tmp_path):
-    monkeypatch.chdir(tmp_path)
+def test_async_step_runs(monkeypatch, mind_workspace):
     monkeypatch.setenv("HUMAN_ASYNC", "1")
     monkeypatch.setenv("HUMAN_ENABLE_ENVS", "0")
-    (tmp_path / "manager").mkdir(parents=True, exist_ok=True)
-    (tmp_path / "plugins").mkdir(parents=True, exist_ok=True)
-    (tmp_path / "tasks").mkdir(parents=True, exist_ok=True)
-    metrics_module.METRICS_FILE = tmp_path / "manager" / "metrics.json"
-    vf_module.VALUE_STATE_FILE = tmp_path / "manager" / "vf.json"
-    from manager.mind import Mind
 
-    mind = Mind()
+    mind = mind_workspace()
 
     def fake_act(tasks, forced_targets=None, strategy=None):
         mind._current_step_actions.append(
@@ -123,18 +195,11 @@ def test_async_step_runs(monkeypatch, tmp_path):
     assert metrics_module.METRICS_FILE.exists()
 
 
-def test_env_and_code_schedule(monkeypatch, tmp_path):
-    monkeypatch.chdir(tmp_path)
+def test_env_and_code_schedule(monkeypatch, mind_workspace):
     monkeypatch.setenv("HUMAN_ENABLE_ENVS", "1")
     monkeypatch.setenv("HUMAN_ENV_RATIO", "1.0")
-    (tmp_path / "manager").mkdir(parents=True, exist_ok=True)
-    (tmp_path / "plugins").mkdir(parents=True, exist_ok=True)
-    (tmp_path / "tasks").mkdir(parents=True, exist_ok=True)
-    metrics_module.METRICS_FILE = tmp_path / "manager" / "metrics.json"
-    vf_module.VALUE_STATE_FILE = tmp_path / "manager" / "vf.json"
-    from manager.mind import Mind
 
-    mind = Mind()
+    mind = mind_workspace()
     monkeypatch.setattr(mind, "_act_and_learn", lambda active_task_names, forced_targets=None, strategy=None: None)
     mind.step()  # env-focused step
 
@@ -149,3 +214,24 @@ def test_env_and_code_schedule(monkeypatch, tmp_path):
     domains = mind.metrics.state.get("recent_domains", [])
     assert any(d in {"env", "mixed"} for d in domains)
     assert "code" in domains or "mixed" in domains
+
+
+def test_diary_append_splices_and_recovers(monkeypatch, tmp_path):
+    import json
+
+    import manager.mind as mind_module
+
+    diary = tmp_path / "diary.json"
+    monkeypatch.setattr(mind_module, "DIARY_FILE", diary)
+    append = mind_module.Mind._append_to_diary
+
+    append(None, {"age": 1})
+    append(None, {"age": 2, "tasks": [3, 4]})
+    assert json.loads(diary.read_text()) == [{"age": 1}, {"age": 2, "tasks": [3, 4]}]
+
+    # a truncated write leaves no closing bracket; the next append rewrites the file
+    diary.write_text('[\n{"age":1},\n{"age":2,"tasks":[3,4],"reflection":"hal')
+    append(None, {"age": 3})
+    assert json.loads(diary.read_text()) == [{"age": 3}]
+    append(None, {"age": 4})
+    assert json.loads(diary.read_text()) == [{"age": 3}, {"age": 4}]
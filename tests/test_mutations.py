@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from manager.mutations import NoneGuardPattern
+
+
+def test_mutated_source_layout_is_pinned():
+    src = 'import os\nX = 1\n\n\ndef f(a):\n    # note\n    return a+1\n\nclass C:\n    y = "q"\n'
+    assert NoneGuardPattern().apply(src) == (
+        "import os\n"
+        "X = 1\n"
+        "\n"
+        "def f(a):\n"
+        "    if a is None:\n"
+        "        return None\n"
+        "    return a + 1\n"
+        "\n"
+        "class C:\n"
+        "    y = 'q'\n"
+    )
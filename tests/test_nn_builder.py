@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import numpy as np
+
+from nn_builder import NetworkChain, NeuralNetwork
+
+
+def test_forward_results_are_not_aliased():
+    net = NeuralNetwork(3, [4], 2, activation="relu")
+    chain = NetworkChain([net, NeuralNetwork(2, [], 1, activation="linear")])
+    x1 = np.ones((2, 3), dtype=np.float32)
+    x2 = np.full((2, 3), -5.0, dtype=np.float32)
+    for model in (net, chain):
+        first = model.forward(x1)
+        kept = first.copy()
+        model.forward(x2)
+        np.testing.assert_array_equal(first, kept)
+
+
+def test_weight_init_is_reproducible():
+    np.random.seed(7)
+    a = NeuralNetwork(3, [4], 2, activation="relu")
+    np.random.seed(7)
+    b = NeuralNetwork(3, [4], 2, activation="relu")
+    c = NeuralNetwork(3, [4], 2, activation="relu", rng=np.random.default_rng(1))
+    d = NeuralNetwork(3, [4], 2, activation="relu", rng=np.random.default_rng(1))
+    for la, lb, lc, ld in zip(a.layers, b.layers, c.layers, d.layers):
+        np.testing.assert_array_equal(la.W, lb.W)
+        np.testing.assert_array_equal(lc.W, ld.W)
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import sqlite3
+
+from query import connect, fetch_neighbors
+
+
+def _diamond_db(path):
+    # 1 -> {2, 3} -> 4, plus 4 -> 1 closing a cycle back to the seed
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE neurons (id INTEGER PRIMARY KEY, label TEXT, source TEXT)")
+    conn.execute("CREATE TABLE edges (src INTEGER, dst INTEGER, kind TEXT)")
+    conn.executemany(
+        "INSERT INTO neurons VALUES (?, ?, ?)",
+        [(1, "a", "s1"), (2, "b", "s1"), (3, "c", "s2"), (4, "d", "s2")],
+    )
+    conn.executemany(
+        "INSERT INTO edges VALUES (?, ?, 'sequence')",
+        [(1, 2), (1, 3), (2, 4), (3, 4), (4, 1)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_multi_hop_reports_each_neighbor_once(tmp_path):
+    db = tmp_path / "g.db"
+    _diamond_db(db)
+    conn = connect(db)
+    cur = conn.cursor()
+    # 4 is reached through both 2 and 3, and again at depth 4 via the cycle
+    rows = list(fetch_neighbors(cur, [1], limit=10, depth=4))
+    assert [r[0] for r in rows] == [2, 3, 4]
+    assert [r[0] for r in fetch_neighbors(cur, [1], limit=2, depth=3)] == [2, 3]
+    # one hop keeps one row per edge
+    assert [r[0] for r in fetch_neighbors(cur, [2, 3], limit=10, depth=1)] == [4, 4]
+    conn.close()
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import json
+
+from manager.reflection import _read_stream
+
+
+class _FakeStream:
+    headers = {"Content-Type": "text/event-stream"}
+
+    def __init__(self, deltas):
+        self.deltas = deltas
+        self.sent = 0
+
+    def iter_lines(self):
+        yield b": keep-alive comment"
+        for delta in self.deltas:
+            self.sent += 1
+            yield b"data: " + json.dumps({"choices": [{"delta": {"content": delta}}]}).encode()
+        yield b"data: [DONE]"
+
+
+def test_read_stream_stops_after_teacher_sentences():
+    deltas = [
+        "One. Two. Three. Four. ",
+        "Five. Six, e.g. TypeError. ",
+        "To my teacher: thanks. ",
+        "I will. ",
+        "Never read.",
+    ]
+    resp = _FakeStream(deltas)
+    text = _read_stream(resp)
+    assert text == "One. Two. Three. Four. Five. Six, e.g. TypeError. To my teacher: thanks. I will."
+    assert resp.sent == 4
+
+
+def test_read_stream_reads_to_done_without_marker():
+    resp = _FakeStream(["Just ", "a status. ", "No teacher part."])
+    assert _read_stream(resp) == "Just a status. No teacher part."
+    assert resp.sent == 3
+
+
+def test_read_stream_accepts_a_plain_json_body():
+    class _Plain:
+        headers = {"Content-Type": "application/json"}
+        content = json.dumps({"choices": [{"message": {"content": "whole reply"}}]}).encode()
+
+    assert _read_stream(_Plain()) == "whole reply"
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+import manager.tasks_state as ts_module
+from manager.tasks import Task
+
+
+@pytest.fixture
+def make_manager(monkeypatch, tmp_path):
+    monkeypatch.setattr(ts_module, "TASK_STATE_FILE", tmp_path / "tasks_state.json")
+
+    def make(n_tasks: int = 6) -> ts_module.TaskStateManager:
+        tasks = {
+            f"t{i}": Task(f"t{i}", f"p{i % 2}", None, "", []) for i in range(n_tasks)
+        }
+        return ts_module.TaskStateManager(tasks)
+
+    return make
+
+
+def _scan_weakest(manager: ts_module.TaskStateManager):
+    # the linear scan get_weakest_task replaced: lowest streak - passes, earliest wins ties
+    names = [n for n in manager.state if not n.startswith("_")]
+    if not names:
+        return None
+    return min(names, key=lambda n: manager.state[n].get("streak", 0) - manager.state[n].get("passes", 0))
+
+
+def test_weakest_task_heap_matches_scan(make_manager):
+    manager = make_manager()
+    rng = random.Random(3)
+    assert manager.get_weakest_task() == _scan_weakest(manager)
+    for _ in range(500):
+        if rng.random() < 0.5:
+            manager.record_plugin_result(f"p{rng.randrange(2)}", rng.random() < 0.5, "")
+        else:
+            # t6 is not a known task, so it is added to the state on first use
+            manager.record_task_results({f"t{rng.randrange(7)}": (rng.random() < 0.4, "")})
+        assert manager.get_weakest_task() == _scan_weakest(manager)
+    # lazy deletion must not let stale entries grow without bound
+    assert len(manager._weak_heap) <= 4 * len(manager._weak_score) + 64
+
+
+def test_state_writes_are_debounced(make_manager, monkeypatch):
+    monkeypatch.setattr(ts_module, "FLUSH_EVERY", 3)
+    manager = make_manager()
+    manager.flush()
+    path = manager.path
+    written = path.read_bytes()
+    for _ in range(2):
+        manager.record_plugin_result("p0", True, "")
+    assert path.read_bytes() == written  # still buffered
+    manager.record_plugin_result("p0", True, "")
+    assert ts_module.json_io.load_path(path)["t0"]["passes"] == 3
+
+
+def test_exit_flush_writes_live_managers(make_manager):
+    manager = make_manager()
+    manager.record_plugin_result("p1", False, "TypeError")
+    assert manager in ts_module._LIVE
+    ts_module._flush_live()
+    assert ts_module.json_io.load_path(manager.path)["t1"]["last_error_type"] == "TypeError"
+    assert not manager.path.with_name(manager.path.name + ".tmp").exists()
+
+
+def test_replaced_manager_is_not_kept_alive(make_manager):
+    import gc
+    import weakref
+
+    manager = make_manager()
+    ref = weakref.ref(manager)
+    manager.flush()
+    manager = make_manager()
+    gc.collect()
+    assert ref() is None
+    assert manager in ts_module._LIVE